@@ -7,6 +7,7 @@ package.domain = org.yourname
 source.dir = .
 
 source.include_exts = py,png,jpg,jpeg,gif,kv,atlas,ttf,otf,wav,mp3,ogg
+source.exclude_dirs = tools
 
 version = 0.1
 requirements = python3,kivy
@@ -2,9 +2,20 @@
 import os
 import math
 import random
+import time
 from typing import List, Optional
 
-from game.logic import Pos, neighbors4, in_bounds, bfs_distances
+from game import atlas
+from game.debug_overlay import DebugOverlay
+from game.journal import UndoJournal
+from game.fieldcache import shared_cache as field_cache
+from game.levelcache import LevelCache, pack_layout
+from game.logic import level_config
+from game.pipeline import LevelPipeline
+from game.profiler import profiler
+from game.savestore import SaveStore
+from game.snapshot import pack_snapshot, unpack_snapshot
+from game.trace import env_target, tracer, traced
 from game.state import GameState, get_biome_for_level
 from game.widget import GameWidget
 from game.ui_style import Theme, style_button, style_panel, apply_screen_bg, attach_icon_fancy
@@ -12,10 +23,8 @@ from game.ui_style import Theme, style_button, style_panel, apply_screen_bg, att
 from kivy.app import App
 from kivy.clock import Clock
 from kivy.core.audio import SoundLoader
-from kivy.core.image import Image as CoreImage
 from kivy.core.window import Window
 from kivy.resources import resource_find
-from kivy.storage.jsonstore import JsonStore
 from kivy.core.text import LabelBase
 
 from kivy.uix.boxlayout import BoxLayout
@@ -28,6 +37,8 @@ from kivy.uix.togglebutton import ToggleButton
 from kivy.core.window import Window
 from kivy.metrics import dp, sp
 
+SNAPSHOT_FILE = "snapshot.bin"  # снимок уровня кампании (game/snapshot.py)
+
 def get_scale():
     min_side = min(Window.width, Window.height)
     return max(1.0, min(1.5, min_side / 700.0))
@@ -47,80 +58,145 @@ def get_safe_bottom_px() -> float:
 
 class MyGameApp(App):
 
+    def on_pause(self):
+        # после паузы Android может убить процесс без on_stop — пишем сейчас
+        self.save_progress()
+        self.save_settings()
+        self.save_meta()
+        self.store.flush()
+        return True
+
     def on_resume(self):
         print("▶️ App resumed from background")
 
         # Попробуем пересоздать отрисовку
         if hasattr(self, "game") and self.game:
             try:
-                self.game.redraw()
+                self.game.redraw(full=True)
                 print("🔁 GameWidget redrawn!")
             except Exception as e:
                 print(f"❌ Redraw error: {e}")
     # ----------------------------
-    # Enemy teleport helper
-    # ----------------------------
-    def teleport_enemy_far(self, st: GameState, hit_pos: Pos) -> None:
-        """Телепортирует врага(ов), стоявших в hit_pos, на далёкую от игрока клетку."""
-        if not st.walls or not st.cfg:
-            return
-
-        dist = bfs_distances(st.walls, st.player)
-        if not dist:
-            return
-
-        h = len(st.walls)
-        w = len(st.walls[0]) if h else 0
-
-        min_safe = max(6, (w + h) // 4)
-        occupied = set(st.enemies)
-
-        candidates: List[Pos] = []
-        for (x, y), d in dist.items():
-            if d < min_safe:
-                continue
-            if st.walls[y][x] == "#":
-                continue
-            if (x, y) == st.player:
-                continue
-            candidates.append((x, y))
-
-        if not candidates:
-            return
-
-        random.shuffle(candidates)
-
-        for i, e in enumerate(st.enemies):
-            if e == hit_pos:
-                occupied.discard(e)
-                for c in candidates:
-                    if c not in occupied:
-                        st.enemies[i] = c
-                        occupied.add(c)
-                        break
-
-    # ----------------------------
     # App lifecycle
     # ----------------------------
     def _restart_game(self, game_widget):
-        self.st.restart()
+        if self.st.world is not None:
+            self._start_endless(game_widget)
+            return
+        self.st.restart(*self.levels.take(1))
+        self._remember_level()
         self.apply_upgrades_to_state()
         self.apply_start_items(new_level=True)
         self.biome = get_biome_for_level(self.st.level)
         self.reset_undo_for_level()
         self.save_progress()
+        self._prefetch_levels()
         game_widget.redraw()
 
     def _next_level(self, game_widget):
         self.st.level += 1
-        self.st.load_level()
+        self.st.load_level(*self.levels.take(self.st.level))
+        self._remember_level()
         self.apply_upgrades_to_state()
         self.apply_start_items(new_level=True)
         self.biome = get_biome_for_level(self.st.level)
         self.reset_undo_for_level()
         self.save_progress()
+        self._prefetch_levels()
+        game_widget.redraw()
+
+    def _load_campaign(self) -> bool:
+        """
+        Кампания с сохранённого прогресса (при запуске): тот же уровень, что
+        был при выходе. True — продолжен по снимку с того же места.
+        """
+        progress = self._saved_progress()
+        if self._resume_snapshot(progress):
+            return True
+        self._reload_campaign_level(progress)
+        return False
+
+    def _leave_endless(self) -> None:
+        """
+        Из бесконечного режима обратно в кампанию. go_endless сохранил прогресс
+        и снимок — с них и продолжаем, вместе с журналом отмены; без снимка
+        уровень собирается заново, жизни и бомбы забега не переносятся.
+        """
+        progress = self._saved_progress()
+        if not self._resume_snapshot(progress):
+            self._reload_campaign_level(progress)
+        self.game.last_enemy_positions = []
+        self.game.redraw()
+
+    def _saved_progress(self) -> dict:
+        return self.store.get("progress") if self.store.exists("progress") else {}
+
+    def _reload_campaign_level(self, progress: dict) -> None:
+        """Уровень кампании с чистыми счётчиками: очки, бомбы, уровень и seed — из прогресса."""
+        st = self.st
+        st.score = int(progress.get("score", 0))
+        st.bombs = int(progress.get("bombs", 0))
+        st.level = max(1, int(progress.get("level", 1)))
+        if "seed" in progress:
+            # снимка нет — тот же уровень с диска или заново из seed;
+            # промах пишется в кэш в фоне, как новый уровень
+            seed = int(progress["seed"])
+            layout = self.level_cache.get(seed, level_config(st.level))
+            st.load_level(layout, seed)
+            if layout is None:
+                self._remember_level()
+        else:
+            st.load_level(*self.levels.take(st.level))
+            self._remember_level()
+        self.apply_upgrades_to_state()
+        st.lives = st.max_lives
+        self.apply_start_items(new_level=True)
+        self.biome = get_biome_for_level(st.level)
+        self.reset_undo_for_level()
+        self._prefetch_levels()
+
+    def _resume_snapshot(self, progress: dict) -> bool:
+        """Уровень с того же места по снимку; снимок должен совпасть с прогрессом."""
+        if "seed" not in progress:
+            return False  # прогресса нет или он из версии без seed — снимку не с чем сверяться
+        data = self.store.read_file(SNAPSHOT_FILE)
+        snap = unpack_snapshot(data) if data else None
+        if snap is None:
+            return False
+        if (snap.state.level != max(1, int(progress.get("level", 1)))
+                or snap.state.seed != int(progress["seed"])):
+            return False
+        snap.apply(self.st)
+        self.apply_upgrades_to_state()
+        self.biome = get_biome_for_level(self.st.level)
+        self.journal = snap.journal
+        self._prefetch_levels()
+        return True
+
+    def _start_endless(self, game_widget) -> None:
+        self.st.start_endless()
+        self.apply_upgrades_to_state()
+        self.apply_start_items(new_level=True)
+        self.biome = get_biome_for_level(self.st.level)
+        self.reset_undo_for_level()
         game_widget.redraw()
 
+    def _prefetch_levels(self) -> None:
+        # следующий уровень и запасной первый — для рестарта
+        self.levels.prefetch(self.st.level + 1, 1)
+
+    def _remember_level(self) -> None:
+        """
+        Только что загруженный уровень — в дисковый кэш: его seed уходит
+        в прогресс и при запуске без снимка раскладка берётся с диска.
+        Упаковка здесь, пока уровень не тронут; запись — в потоке LevelPipeline.
+        """
+        st = self.st
+        data = pack_layout(st.seed, st.cfg, (st.walls, st.start, st.goal,
+                                             st.treasures, st.medkits, st.enemies))
+        self.levels.background(self.level_cache.write, st.seed, st.cfg, data)
+
+    @traced()
     def build(self):
         random.seed()
         self.theme = Theme()
@@ -133,14 +209,15 @@ class MyGameApp(App):
         self.game_over_active = False
         self.paused = False
 
-        # save storage
-        self.store = JsonStore(os.path.join(self.user_data_dir, "save.json"))
+        # save storage: изменения копятся в памяти, файл пишется в фоне (game/savestore.py)
+        self.store = SaveStore(os.path.join(self.user_data_dir, "save.json"))
 
         # audio settings
         self.music_enabled = True
         self.sounds_enabled = True
         self.music_volume = 0.7  # 0..1
         self.sounds_volume = 0.8  # 0..1
+        self.animations_enabled = True  # покачивание, пульсация, взрывы
 
         # meta progression
         self.crystals = 0
@@ -152,12 +229,11 @@ class MyGameApp(App):
             "start_bomb_chance": 0.0,
         }
 
-        # Undo
-        self.undo_state = None
-        self.undo_available = True
+        # Undo/Redo: журнал разниц по ходам (game/journal.py)
+        self.journal = UndoJournal()
 
-        # debounced save
-        self._save_progress_ev = None
+        # уровень продолжен по снимку — после заставки сразу в игру
+        self.resumed = False
 
         # debug overlay toggle (F2)
         self.debug_overlay = False
@@ -170,13 +246,7 @@ class MyGameApp(App):
             self.sounds_enabled = bool(sdata.get("sounds_enabled", True))
             self.music_volume = float(sdata.get("music_volume", self.music_volume))
             self.sounds_volume = float(sdata.get("sounds_volume", self.sounds_volume))
-
-        # load progress
-        if self.store.exists("progress"):
-            data = self.store.get("progress")
-            self.st.score = int(data.get("score", 0))
-            self.st.bombs = int(data.get("bombs", 0))
-            self.st.level = max(1, int(data.get("level", 1)))
+            self.animations_enabled = bool(sdata.get("animations_enabled", True))
 
         # load meta
         if self.store.exists("meta"):
@@ -190,15 +260,14 @@ class MyGameApp(App):
             self.upgrades["start_bomb_chance"] = float(up.get("start_bomb_chance", 0.0))
 
         # build initial level
-        self.st.load_level()
-        self.apply_upgrades_to_state()
-        self.apply_start_items(new_level=True)
-        self.biome = get_biome_for_level(self.st.level)
+        self.level_cache = LevelCache(os.path.join(self.user_data_dir, "levels"))
+        self.levels = LevelPipeline()
+        self.resumed = self._load_campaign()
 
-        # textures
-        self.player_tex = self._load_texture("assets/player.png")
-        self.skeleton_tex = self._load_texture("assets/skeleton.png")
-        self.explosion_frames = self._load_explosion_frames("assets/explosion_", 8)
+        # textures (из атласа assets/game.atlas, иначе из исходных PNG)
+        self.player_tex = self._load_texture("player", "assets/player.png")
+        self.skeleton_tex = self._load_texture("skeleton", "assets/skeleton.png")
+        self.explosion_frames = self._load_explosion_frames("explosion_", "assets/explosion_")
 
         # sounds
         self.snd_pickup = self._load_sound("assets/snd_pickup.mp3")
@@ -230,63 +299,87 @@ class MyGameApp(App):
         self.save_progress()
         self.save_settings()
         self.save_meta()
+        self.store.close()
+        self.levels.shutdown()
+        if tracer.enabled:
+            self.save_trace(env_target())
 
     # ----------------------------
     # Tick only when in game screen
     # ----------------------------
     def _tick(self, dt: float) -> None:
+        profiler.end_frame(dt)
         if self.sm.current != "game":
             return
         if self.paused or self.game_over_active:
             return
-        self.game.animate(dt)
+        with profiler.phase("animate"):
+            self.game.animate(dt)
 
     def _on_key_down_global(self, window, key, scancode, codepoint, modifiers):
         if key == 293:  # F2
-            self.debug_overlay = not self.debug_overlay
+            self.set_debug_overlay(not self.debug_overlay)
+            return True
+        if key == 294 and self.debug_overlay:  # F3 — выгрузить профиль в CSV
+            self.profiler_overlay.dump()
+            return True
+        if key == 295:  # F4 — начать/закончить запись трассы
+            if tracer.enabled:
+                path = self.save_trace()
+                if path:
+                    self.flash_message(f"Трасса: {os.path.basename(path)}")
+            else:
+                tracer.start()
+                self.flash_message("Запись трассы...")
             return True
         return False
 
+    def save_trace(self, target: Optional[str] = None) -> Optional[str]:
+        """Остановить трассировку и записать JSON; target "1"/None — файл в user_data_dir."""
+        tracer.stop()
+        if not target or target == "1":
+            target = os.path.join(self.user_data_dir, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        try:
+            n = tracer.save(target)
+        except OSError as e:
+            print(f"[trace] save failed: {target} ({e})")
+            return None
+        print(f"[trace] {n} events -> {target}")
+        return target
+
+    def set_debug_overlay(self, on: bool) -> None:
+        self.debug_overlay = on
+        profiler.set_enabled(on)
+        if hasattr(self, "profiler_overlay"):
+            self.profiler_overlay.opacity = 1.0 if on else 0.0
+            self.profiler_overlay.disabled = not on
+
     # ----------------------------
     # Undo
     # ----------------------------
-    def save_undo_state(self) -> None:
-        if not self.undo_available:
-            return
-        st = self.st
-        self.undo_state = {
-            "score": st.score,
-            "lives": st.lives,
-            "bombs": st.bombs,
-            "player": st.player,
-            "treasures": set(st.treasures),
-            "medkits": set(st.medkits),
-            "enemies": list(st.enemies),
-            "walls": [row[:] for row in st.walls],
-        }
-
     def perform_undo(self, game_widget: GameWidget) -> None:
-        if not self.undo_state:
+        if self.game_over_active or self.paused:
+            return
+        if not self.journal.undo_step(self.st):
             self.flash_message("Отмена недоступна")
             return
-        st = self.st
-        u = self.undo_state
-        st.score = u["score"]
-        st.lives = u["lives"]
-        st.bombs = u["bombs"]
-        st.player = u["player"]
-        st.treasures = set(u["treasures"])
-        st.medkits = set(u["medkits"])
-        st.enemies = list(u["enemies"])
-        st.walls = [row[:] for row in u["walls"]]
-        st.message = None
-        self.undo_state = None
-        self.undo_available = False
+        self._after_journal_step(game_widget)
+
+    def perform_redo(self, game_widget: GameWidget) -> None:
+        if self.game_over_active or self.paused:
+            return
+        if not self.journal.redo_step(self.st):
+            self.flash_message("Повтор недоступен")
+            return
+        self._after_journal_step(game_widget)
+
+    def _after_journal_step(self, game_widget: GameWidget) -> None:
+        game_widget.last_enemy_positions = []  # подсветка прошлого хода уже не о том ходе
+        self.request_save_progress()
         game_widget.redraw()
 
     def reset_undo_for_level(self) -> None:
-        self.undo_state = None
-        self.undo_available = True
+        self.journal.clear()
 
     # ----------------------------
     # Upgrades / meta
@@ -315,36 +408,25 @@ class MyGameApp(App):
         self.save_meta()
 
     # ----------------------------
-    # Debounced save progress
+    # Save progress after a turn
     # ----------------------------
     def request_save_progress(self) -> None:
-        if self._save_progress_ev is not None:
-            return
-        self._save_progress_ev = Clock.schedule_once(lambda _dt: self._flush_save_progress(), 0.6)
-
-    def _flush_save_progress(self) -> None:
-        self._save_progress_ev = None
+        # put только в память — склейку записей делает SaveStore
         self.save_progress()
 
     # ----------------------------
     # Resource loading
     # ----------------------------
-    def _load_texture(self, path: str):
-        try:
-            real = resource_find(path) or path
-            img = CoreImage(real)
-            return img.texture
-        except Exception:
-            return None
+    @traced(cat="assets")
+    def _load_texture(self, name: str, path: str):
+        return atlas.texture(name, path)
 
-    def _load_explosion_frames(self, base: str, count: int) -> List:
-        frames: List = []
-        for i in range(count):
-            tex = self._load_texture(f"{base}{i}.png")
-            if tex:
-                frames.append(tex)
-        return frames
+    @traced(cat="assets")
+    def _load_explosion_frames(self, prefix: str, base: str) -> List:
+        # сколько кадров есть, столько и берём (раньше пробовали 8 при 6 файлах)
+        return atlas.frames(prefix, base)
 
+    @traced(cat="assets")
     def _load_sound(self, path: str):
         try:
             real = resource_find(path) or path
@@ -385,6 +467,13 @@ class MyGameApp(App):
         self.sounds_enabled = enabled
         self.save_settings()
 
+    def set_animations_enabled(self, enabled: bool) -> None:
+        self.animations_enabled = enabled
+        if hasattr(self, "game"):
+            self.game.frames.animations = enabled
+            self.game.redraw()
+        self.save_settings()
+
     def set_music_volume(self, value: float) -> None:
         self.music_volume = max(0.0, min(1.0, float(value)))
         if self.music_sound:
@@ -410,6 +499,7 @@ class MyGameApp(App):
     # ----------------------------
     # Screens
     # ----------------------------
+    @traced()
     def _build_screens(self) -> None:
         scale = get_scale()
         # --- SPLASH ---
@@ -483,6 +573,7 @@ class MyGameApp(App):
 
         mbox.add_widget(mtitle)
         mbox.add_widget(make_btn("Играть", self.go_game, "primary"))
+        mbox.add_widget(make_btn("Бесконечный режим", self.go_endless))
         mbox.add_widget(make_btn("Настройки", self.go_settings))
         mbox.add_widget(make_btn("Как играть", self.go_howto))
         mbox.add_widget(make_btn("Магазин", self.go_shop))
@@ -506,6 +597,7 @@ class MyGameApp(App):
         # фон не обязателен (поле рисует фон само), но можно добавить лёгкий:
         # apply_screen_bg(game_screen, self.theme, vignette=False, gradient_steps=6)
         game_root, self.hud, self.game = self._create_game_ui()
+        self.game.frames.animations = self.animations_enabled
         game_screen.add_widget(game_root)
         self.sm.add_widget(game_screen)
 
@@ -612,6 +704,13 @@ class MyGameApp(App):
         # Громкость звуков
         sounds_vol_row = make_slider_row("Громк. зв.", self.sounds_volume, self.set_sounds_volume)
 
+        # Анимации toggle (выкл — поле перерисовывается только после хода)
+        anim_row, self.anim_toggle = make_toggle_row(
+            "Анимации",
+            self.animations_enabled,
+            lambda btn: (sync_toggle(btn, btn.state == "down"), self.set_animations_enabled(btn.state == "down"))
+        )
+
         back_btn = Button(
             text="Назад",
             size_hint_y=None,
@@ -626,6 +725,7 @@ class MyGameApp(App):
         sbox.add_widget(music_vol_row)
         sbox.add_widget(sounds_row)
         sbox.add_widget(sounds_vol_row)
+        sbox.add_widget(anim_row)
         sbox.add_widget(back_btn)
 
         sv.add_widget(sbox)
@@ -879,7 +979,7 @@ class MyGameApp(App):
         self.sm.add_widget(upgrades)
 
         # go to menu after splash
-        Clock.schedule_once(lambda _dt: self.go_menu(), 1.4)
+        Clock.schedule_once(lambda _dt: self.go_game() if self.resumed else self.go_menu(), 1.4)
 
     # ----------------------------
     # GAME ui (NEW DESIGN)
@@ -973,26 +1073,33 @@ class MyGameApp(App):
         root.add_widget(self.next_btn)
 
         # ---------- Нижние кнопки (по краям) ----------
+        # пять кнопок в ряд должны влезть и в узкий экран (360dp): там они чуть меньше
+        gap = dp(12) * scale
+        btn_size = min(dp(72) * scale,
+                       (Window.width - 2 * dp(16) * scale - 3 * gap - dp(16)) / 5)
+
         def make_btn(name, cb):
-            btn = Button(size_hint=(None, None), size=(dp(72) * scale, dp(72) * scale))
+            btn = Button(size_hint=(None, None), size=(btn_size, btn_size))
             style_button(btn, self.theme, "ghost")
             attach_icon_fancy(
                 btn,
-                icon_path=f"assets/icons/{name}.png",
-                icon_bg="assets/ui/circle_glow.png",
+                icon_path=atlas.source(name, f"assets/icons/{name}.png"),
+                icon_bg=atlas.source("circle_glow", "assets/ui/circle_glow.png"),
                 size_ratio=0.85
             )
             btn.bind(on_release=cb)
             return btn
 
-        # Левая группа (бомба + undo)
+        # Левая группа (бомба + undo + redo)
         bomb_btn = make_btn("bomb", lambda *_: game_widget.use_bomb())
         undo_btn = make_btn("undo", lambda *_: self.perform_undo(game_widget))
-        left_box = BoxLayout(orientation="horizontal", spacing=dp(12) * scale, size_hint=(None, None),
-                             height=dp(72) * scale)
+        self.redo_btn = make_btn("redo", lambda *_: self.perform_redo(game_widget))
+        left_box = BoxLayout(orientation="horizontal", spacing=gap, size_hint=(None, None),
+                             height=btn_size)
         left_box.add_widget(bomb_btn)
         left_box.add_widget(undo_btn)
-        left_box.width = 2 * dp(72) * scale + dp(12) * scale
+        left_box.add_widget(self.redo_btn)
+        left_box.width = 3 * btn_size + 2 * gap
 
         safe_bottom = get_safe_bottom_px()
 
@@ -1009,11 +1116,11 @@ class MyGameApp(App):
         pause_btn = make_btn("pause", lambda *_: self.show_pause_dialog())
         restart_btn = make_btn("restart", lambda *_: self._restart_game(game_widget))
 
-        right_box = BoxLayout(orientation="horizontal", spacing=dp(12) * scale, size_hint=(None, None),
-                              height=dp(72) * scale)
+        right_box = BoxLayout(orientation="horizontal", spacing=gap, size_hint=(None, None),
+                              height=btn_size)
         right_box.add_widget(pause_btn)
         right_box.add_widget(restart_btn)
-        right_box.width = 2 * dp(72) * scale + dp(12) * scale
+        right_box.width = 2 * btn_size + gap
 
         right_anchor = AnchorLayout(
             anchor_x="right",
@@ -1024,6 +1131,19 @@ class MyGameApp(App):
         right_anchor.add_widget(right_box)
         root.add_widget(right_anchor)
 
+        # ---------- Профайлер (F2) ----------
+        overlay = DebugOverlay(profiler, self.user_data_dir, scale=scale,
+                               on_dump=lambda path: self.flash_message(f"Профиль: {os.path.basename(path)}"))
+
+        def place_overlay(*_):
+            overlay.pos = (dp(8) * scale, Window.height - top_hud - overlay.height - dp(8) * scale)
+        place_overlay()
+        Window.bind(size=place_overlay)
+        overlay.opacity = 1.0 if self.debug_overlay else 0.0
+        overlay.disabled = not self.debug_overlay
+        root.add_widget(overlay)
+        self.profiler_overlay = overlay
+
         return root, hud, game_widget
 
     # ----------------------------
@@ -1104,13 +1224,7 @@ class MyGameApp(App):
 
         def do_restart(_btn):
             self.game_over_active = False
-            self.st.restart()
-            self.apply_upgrades_to_state()
-            self.apply_start_items(new_level=True)
-            self.biome = get_biome_for_level(self.st.level)
-            self.reset_undo_for_level()
-            self.save_progress()
-            self.game.redraw()
+            self._restart_game(self.game)
             popup.dismiss()
             self.sm.current = "game"
 
@@ -1130,6 +1244,13 @@ class MyGameApp(App):
         self.sm.current = "menu"
 
     def go_game(self, *_):
+        if self.st.world is not None:
+            self._leave_endless()
+        self.sm.current = "game"
+
+    def go_endless(self, *_):
+        self.save_progress()  # кампания продолжится с этого места
+        self._start_endless(self.game)
         self.sm.current = "game"
 
     def go_settings(self, *_):
@@ -1161,26 +1282,38 @@ class MyGameApp(App):
     # Save
     # ----------------------------
     def save_progress(self) -> None:
-        self.store.put(
-            "progress",
-            score=int(self.st.score),
-            bombs=int(self.st.bombs),
-            level=int(self.st.level),
-        )
+        if self.st.world is not None:
+            return  # прогресс — только кампании; бесконечный забег не сохраняется
+        with profiler.phase("save"):
+            self.store.put(
+                "progress",
+                score=int(self.st.score),
+                bombs=int(self.st.bombs),
+                level=int(self.st.level),
+                seed=int(self.st.seed),
+            )
+            # вся карта с игроком и врагами; None (жизни кончились) удаляет снимок
+            self.store.put_file(SNAPSHOT_FILE,
+                                pack_snapshot(self.st, self.journal))
 
     def save_settings(self) -> None:
-        self.store.put(
-            "settings",
-            music_enabled=bool(self.music_enabled),
-            sounds_enabled=bool(self.sounds_enabled),
-        )
+        with profiler.phase("save"):
+            self.store.put(
+                "settings",
+                music_enabled=bool(self.music_enabled),
+                sounds_enabled=bool(self.sounds_enabled),
+                music_volume=float(self.music_volume),
+                sounds_volume=float(self.sounds_volume),
+                animations_enabled=bool(self.animations_enabled),
+            )
 
     def save_meta(self) -> None:
-        self.store.put(
-            "meta",
-            crystals=int(self.crystals),
-            upgrades=self.upgrades,
-        )
+        with profiler.phase("save"):
+            self.store.put(
+                "meta",
+                crystals=int(self.crystals),
+                upgrades=self.upgrades,
+            )
 
     def _update_shop_labels(self) -> None:
         if hasattr(self, "shop_info"):
@@ -1204,6 +1337,12 @@ class MyGameApp(App):
     # HUD update (NEW)
     # ----------------------------
     def _update_hud(self, _dt):
+        with profiler.phase("hud"):
+            self._refresh_hud()
+        if self.debug_overlay and hasattr(self, "profiler_overlay"):
+            self.profiler_overlay.update(self.game)
+
+    def _refresh_hud(self) -> None:
         left = len(self.st.treasures) if self.st.treasures is not None else 0
         msg = self.st.message or ""
         biome_name = getattr(getattr(self, "biome", None), "name", "")
@@ -1217,10 +1356,18 @@ class MyGameApp(App):
             else:
                 arrow = "U" if dy > 0 else "D"
 
+        world = self.st.world
         if hasattr(self, "lbl_level"):
-            self.lbl_level.text = f"Уровень {self.st.level} • {biome_name}"
+            if world is not None:
+                self.lbl_level.text = f"Бесконечный режим • {biome_name}"
+            else:
+                self.lbl_level.text = f"Уровень {self.st.level} • {biome_name}"
         if hasattr(self, "lbl_hint"):
-            self.lbl_hint.text = f"Портал: {arrow}   Осталось сокровищ: {left}"
+            if world is not None:
+                cx, cy = world.center
+                self.lbl_hint.text = f"Чанк: {cx}, {cy}   Сокровищ рядом: {left}"
+            else:
+                self.lbl_hint.text = f"Портал: {arrow}   Осталось сокровищ: {left}"
         if hasattr(self, "lbl_lives"):
             self.lbl_lives.text = f"Жизни: {self.st.lives}/{self.st.max_lives}"
         if hasattr(self, "lbl_score"):
@@ -1229,7 +1376,11 @@ class MyGameApp(App):
             tail = f"Бомбы: {self.st.bombs}   Кристаллы: {self.crystals}"
             if self.debug_overlay:
                 from kivy.clock import Clock as KClock
-                tail += f"   FPS: {int(KClock.get_fps())}"
+                tail += (f"   FPS: {int(KClock.get_fps())}"
+                         f"   Кадры: {self.game.frames.current_fps():.0f}/с"
+                         f"   BFS кэш: {field_cache.hits}/{field_cache.repairs}/{field_cache.misses}")
+                if world is not None:
+                    tail += f"   Чанки: {len(world.loaded)}/{len(world.compact)}"
             self.lbl_items.text = tail
         if hasattr(self, "lbl_msg"):
             self.lbl_msg.text = msg
@@ -1240,4 +1391,10 @@ class MyGameApp(App):
             self.next_btn.opacity = 1.0 if show_next else 0.0
             self.next_btn.disabled = not show_next
 
+        # повтор — только когда есть что повторять
+        if hasattr(self, "redo_btn"):
+            can_redo = self.journal.can_redo()
+            self.redo_btn.disabled = not can_redo
+            self.redo_btn.opacity = 1.0 if can_redo else 0.4
+
         self._update_shop_labels()
\ No newline at end of file
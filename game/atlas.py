@@ -0,0 +1,70 @@
+# game/atlas.py
+"""
+Текстуры игровой графики из атласа assets/game.atlas (tools/build_atlas.py).
+
+Атлас — одна уменьшенная текстура вместо десятка PNG по 1024px: меньше
+видеопамяти, быстрее старт, меньше смен текстур при отрисовке. Если
+атласа нет (не собран) или в нём нет имени, берётся исходный PNG.
+"""
+from typing import List, Optional
+
+from kivy.atlas import Atlas
+from kivy.core.image import Image as CoreImage
+from kivy.resources import resource_find
+
+ATLAS_PATH = "assets/game.atlas"
+ATLAS_URI = "atlas://assets/game/"
+
+_atlas: Optional[Atlas] = None
+_loaded = False
+
+
+def get_atlas() -> Optional[Atlas]:
+    global _atlas, _loaded
+    if not _loaded:
+        _loaded = True
+        real = resource_find(ATLAS_PATH)
+        if real:
+            try:
+                _atlas = Atlas(real)
+            except Exception as e:
+                print(f"[atlas] load failed: {real} ({e})")
+    return _atlas
+
+
+def has(name: str) -> bool:
+    atlas = get_atlas()
+    return atlas is not None and name in atlas.textures
+
+
+def source(name: str, fallback: str) -> str:
+    """Путь для Image/CoreImage: atlas://... или исходный PNG."""
+    return ATLAS_URI + name if has(name) else fallback
+
+
+def texture(name: str, fallback: str):
+    """Текстура из атласа или из fallback; None, если нет ни того, ни другого."""
+    atlas = get_atlas()
+    if atlas is not None and name in atlas.textures:
+        return atlas[name]
+    try:
+        return CoreImage(resource_find(fallback) or fallback).texture
+    except Exception:
+        return None
+
+
+def frames(prefix: str, fallback_base: str) -> List:
+    """Кадры prefix0, prefix1, ... подряд, пока следующего нет."""
+    out: List = []
+    while True:
+        i = len(out)
+        name = f"{prefix}{i}"
+        if has(name):
+            out.append(get_atlas()[name])
+            continue
+        if not resource_find(f"{fallback_base}{i}.png"):
+            return out
+        tex = texture(name, f"{fallback_base}{i}.png")
+        if tex is None:
+            return out
+        out.append(tex)
@@ -0,0 +1,99 @@
+# game/camera.py
+"""
+Камера игрового поля: размер клетки, следование за игроком, зум и сдвиг.
+
+Без Kivy: виджет передаёт размеры области и карты, камера возвращает View —
+размер клетки, экранные координаты клетки (0, 0) и диапазон видимых клеток.
+Рисовать нужно только клетки и объекты из этого диапазона, поэтому число
+инструкций зависит от площади экрана, а не карты.
+
+Если карта при базовом размере клетки помещается в область, она
+центрируется целиком, как раньше. Большая карта прокручивается: в
+центре — игрок плюс ручной сдвиг (pan), края карты не отходят от краёв
+области дальше отступа.
+"""
+import math
+from dataclasses import dataclass
+from typing import Tuple
+
+from game.grid import Pos
+
+ZOOM_MIN = 0.5
+ZOOM_MAX = 3.0
+MIN_TILE_PX = 10  # меньше клетку не рисуем даже при отдалении
+
+
+@dataclass
+class View:
+    tile: int
+    ox: float   # экранные координаты левого нижнего угла клетки (0, 0)
+    oy: float
+    x0: int     # видимые клетки: x0 <= x < x1, y0 <= y < y1
+    y0: int
+    x1: int
+    y1: int
+
+    def contains(self, p: Pos) -> bool:
+        return self.x0 <= p[0] < self.x1 and self.y0 <= p[1] < self.y1
+
+    def cell(self, p: Pos) -> Tuple[float, float]:
+        """Экранные координаты левого нижнего угла клетки p."""
+        return self.ox + p[0] * self.tile, self.oy + p[1] * self.tile
+
+    def cells(self) -> int:
+        return max(0, self.x1 - self.x0) * max(0, self.y1 - self.y0)
+
+
+class Camera:
+    def __init__(self, min_tile: float = 28.0, pad: float = 10.0):
+        self.min_tile = min_tile  # клетка не мельче этого при зуме 1
+        self.pad = pad
+        self.zoom = 1.0
+        self.pan_x = 0.0          # ручной сдвиг центра, в клетках
+        self.pan_y = 0.0
+
+    # ---- жесты ----
+
+    def zoom_by(self, factor: float) -> None:
+        self.zoom = min(ZOOM_MAX, max(ZOOM_MIN, self.zoom * factor))
+
+    def pan_by(self, dx_cells: float, dy_cells: float) -> None:
+        self.pan_x += dx_cells
+        self.pan_y += dy_cells
+
+    def recenter(self) -> None:
+        """Снова следовать за игроком (после хода)."""
+        self.pan_x = self.pan_y = 0.0
+
+    # ---- раскладка ----
+
+    def layout(self, x: float, y: float, width: float, height: float,
+               map_w: int, map_h: int, focus: Pos) -> View:
+        pad = self.pad
+        avail_w = max(1.0, width - 2 * pad)
+        avail_h = max(1.0, height - 2 * pad)
+        fit = min(avail_w / map_w, avail_h / map_h)
+        tile = max(MIN_TILE_PX, int(max(fit, self.min_tile) * self.zoom))
+
+        # сдвиг не уводит центр за карту — иначе обратный жест сначала «пустой»
+        self.pan_x = min(map_w - 1 - focus[0], max(-focus[0], self.pan_x))
+        self.pan_y = min(map_h - 1 - focus[1], max(-focus[1], self.pan_y))
+
+        ox = self._axis(x, width, map_w, tile, focus[0] + self.pan_x)
+        oy = self._axis(y, height, map_h, tile, focus[1] + self.pan_y)
+
+        x0 = max(0, int(math.floor((x - ox) / tile)))
+        y0 = max(0, int(math.floor((y - oy) / tile)))
+        x1 = min(map_w, int(math.ceil((x + width - ox) / tile)))
+        y1 = min(map_h, int(math.ceil((y + height - oy) / tile)))
+        return View(tile, ox, oy, x0, y0, x1, y1)
+
+    def _axis(self, start: float, size: float, cells: int, tile: int, focus: float) -> float:
+        """Экранная координата начала карты по одной оси."""
+        extent = cells * tile
+        if extent + 2 * self.pad <= size:
+            return start + (size - extent) / 2  # помещается — по центру
+        origin = start + size / 2 - (focus + 0.5) * tile
+        lo = start + size - self.pad - extent  # правый/верхний край карты у края области
+        hi = start + self.pad
+        return min(hi, max(lo, origin))
@@ -0,0 +1,133 @@
+# game/debug_overlay.py
+"""
+Оверлей F2: таблица фаз профайлера, счётчики инструкций и график
+длительности кадров (данные — game/profiler.py).
+
+Обновляется из _update_hud (10 раз в секунду), пока виден; скрытый
+оверлей ничего не считает. Кнопка CSV пишет последние DUMP_S секунд
+в user_data_dir — на телефоне F2 и F3 нет, а кнопка есть.
+"""
+import os
+import time
+from typing import Callable, Optional
+
+from kivy.graphics import Color, Line, Rectangle
+from kivy.metrics import dp, sp
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.widget import Widget
+
+from game.profiler import PHASES, Profiler, count_instructions
+
+GRAPH_FRAMES = 120
+GRAPH_MAX_MS = 50.0
+BUDGET_MS = (1000 / 60, 1000 / 30)  # линии 60 и 30 кадров в секунду
+DUMP_S = 30.0
+
+
+class FrameGraph(Widget):
+    """Последние GRAPH_FRAMES кадров ломаной; выше GRAPH_MAX_MS — по верхнему краю."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        with self.canvas:
+            Color(0, 0, 0, 0.55)
+            self._bg = Rectangle()
+            Color(0.32, 0.93, 0.58, 0.5)
+            self._budget60 = Line(width=1)
+            Color(1.0, 0.35, 0.40, 0.5)
+            self._budget30 = Line(width=1)
+            Color(0.35, 0.80, 1.0, 1)
+            self._line = Line(width=1.2)
+        self.bind(pos=lambda *_: self._layout(), size=lambda *_: self._layout())
+
+    def _y(self, ms: float) -> float:
+        return self.y + self.height * min(ms, GRAPH_MAX_MS) / GRAPH_MAX_MS
+
+    def _layout(self) -> None:
+        self._bg.pos, self._bg.size = self.pos, self.size
+        for line, ms in ((self._budget60, BUDGET_MS[0]), (self._budget30, BUDGET_MS[1])):
+            y = self._y(ms)
+            line.points = [self.x, y, self.right, y]
+
+    def update(self, times) -> None:
+        if len(times) < 2:
+            self._line.points = []
+            return
+        step = self.width / (GRAPH_FRAMES - 1)
+        x0 = self.right - step * (len(times) - 1)
+        pts = []
+        for i, ms in enumerate(times):
+            pts.extend((x0 + i * step, self._y(ms)))
+        self._line.points = pts
+
+
+class DebugOverlay(BoxLayout):
+    def __init__(self, prof: Profiler, out_dir: str, scale: float = 1.0,
+                 on_dump: Optional[Callable[[str], None]] = None, **kwargs):
+        kwargs.setdefault("orientation", "vertical")
+        kwargs.setdefault("size_hint", (None, None))
+        kwargs.setdefault("size", (dp(300) * scale, dp(260) * scale))
+        kwargs.setdefault("padding", dp(6) * scale)
+        kwargs.setdefault("spacing", dp(4) * scale)
+        super().__init__(**kwargs)
+        self.prof = prof
+        self.out_dir = out_dir
+        self.on_dump = on_dump
+
+        with self.canvas.before:
+            Color(0.03, 0.04, 0.07, 0.75)
+            self._bg = Rectangle()
+        self.bind(pos=lambda *_: self._bg_layout(), size=lambda *_: self._bg_layout())
+
+        # моноширинный шрифт из Kivy — столбцы таблицы ровные
+        self.text = Label(font_size=sp(11) * scale, halign="left", valign="top",
+                          font_name="data/fonts/RobotoMono-Regular.ttf",
+                          color=(0.95, 0.96, 1.0, 1))
+        self.text.bind(size=lambda lbl, sz: setattr(lbl, "text_size", sz))
+        self.graph = FrameGraph(size_hint_y=None, height=dp(60) * scale)
+        dump = Button(text="CSV", size_hint=(None, None),
+                      size=(dp(64) * scale, dp(28) * scale), font_size=sp(12) * scale)
+        dump.bind(on_release=lambda *_: self.dump())
+
+        self.add_widget(self.text)
+        self.add_widget(self.graph)
+        self.add_widget(dump)
+
+    def _bg_layout(self) -> None:
+        self._bg.pos, self._bg.size = self.pos, self.size
+
+    def on_touch_down(self, touch):
+        # скрытый оверлей не перехватывает касания поля
+        if self.opacity == 0:
+            return False
+        return super().on_touch_down(touch)
+
+    def update(self, game) -> None:
+        prof = self.prof
+        p50, p95, p99 = prof.percentiles()
+        lines = [f"кадр мс  p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}",
+                 "фаза           кадров  ср.мс  макс"]
+        stats = prof.phase_stats()
+        for name in PHASES:
+            n, avg, peak = stats[name]
+            lines.append(f"{name:<14} {n:>5} {avg:>6.2f} {peak:>6.2f}")
+        r = game.renderer
+        lines.append(f"инструкций: {count_instructions(game.canvas)}"
+                     f"   пересборок: {r.rebuilds}   Fbo: {r.bakes}")
+        self.text.text = "\n".join(lines)
+        self.graph.update(prof.frame_times(GRAPH_FRAMES))
+
+    def dump(self) -> Optional[str]:
+        name = time.strftime("profile-%Y%m%d-%H%M%S.csv")
+        path = os.path.join(self.out_dir, name)
+        try:
+            rows = self.prof.dump_csv(path, DUMP_S)
+        except OSError as e:
+            print(f"[profiler] dump failed: {path} ({e})")
+            return None
+        print(f"[profiler] {rows} frames -> {path}")
+        if self.on_dump:
+            self.on_dump(path)
+        return path
@@ -0,0 +1,123 @@
+# game/effects.py
+"""
+Короткие эффекты поля: взрывы бомб и вспышки ударов.
+
+Эффекты живут в пулах фиксированной ёмкости: слоты создаются один раз,
+погасший эффект возвращает слот в список свободных, а если свободных нет
+(серия бомб, толпа врагов) — переиспользуется самый старый. На тике
+ничего не аллоцируется: update() пересчитывает progress живых эффектов
+на месте и гасит закончившиеся.
+
+Здесь нет Kivy: рендерер (game/render.py) держит под каждый слот готовую
+группу инструкций и по progress выставляет альфу, радиус и кадр атласа.
+"""
+from typing import Dict, Iterator, List, Sequence
+
+from game.grid import Pos
+
+EXPLOSION = "explosion"
+HIT_FLASH = "hit_flash"
+
+DURATION: Dict[str, float] = {
+    EXPLOSION: 0.5,
+    HIT_FLASH: 0.35,
+}
+CAPACITY = 48  # на вид эффекта; с запасом для серии бомб
+
+
+class Effect:
+    __slots__ = ("x", "y", "t0", "progress")
+
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+        self.t0 = 0.0
+        self.progress = 0.0  # 0..1; меньше 0 — ещё не начался (задержка в серии)
+
+    @property
+    def pos(self) -> Pos:
+        return self.x, self.y
+
+
+class EffectPool:
+    def __init__(self, duration: float, capacity: int = CAPACITY):
+        self.duration = duration
+        self.capacity = capacity
+        self.slots: List[Effect] = [Effect() for _ in range(capacity)]
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        self.live: List[int] = []  # номера слотов в порядке запуска
+        self.recycled = 0          # сколько раз пришлось гасить живой эффект
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def spawn(self, pos: Pos, now: float, delay: float = 0.0) -> Effect:
+        if self._free:
+            i = self._free.pop()
+        else:
+            i = self.live.pop(0)  # пул полон — отдаём самый старый
+            self.recycled += 1
+        fx = self.slots[i]
+        fx.x, fx.y = pos
+        fx.t0 = now + delay
+        fx.progress = -1.0 if delay > 0 else 0.0
+        self.live.append(i)
+        return fx
+
+    def update(self, now: float) -> None:
+        """Пересчитать progress и вернуть в пул закончившиеся эффекты."""
+        live, slots, dur = self.live, self.slots, self.duration
+        keep = 0
+        for i in live:
+            fx = slots[i]
+            t = now - fx.t0
+            if t >= dur:
+                self._free.append(i)
+                continue
+            fx.progress = t / dur if t >= 0 else -1.0
+            live[keep] = i
+            keep += 1
+        del live[keep:]
+
+    def visible(self) -> Iterator[Effect]:
+        """Начавшиеся эффекты, от старых к новым."""
+        slots = self.slots
+        for i in self.live:
+            fx = slots[i]
+            if fx.progress >= 0:
+                yield fx
+
+    def clear(self) -> None:
+        self._free.extend(reversed(self.live))
+        self.live.clear()
+
+
+class Effects:
+    """Все эффекты поля; время — anim_time виджета."""
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.pools: Dict[str, EffectPool] = {
+            kind: EffectPool(dur, capacity) for kind, dur in DURATION.items()
+        }
+        self.explosions = self.pools[EXPLOSION]
+        self.flashes = self.pools[HIT_FLASH]
+
+    def spawn(self, kind: str, pos: Pos, now: float, delay: float = 0.0) -> Effect:
+        return self.pools[kind].spawn(pos, now, delay)
+
+    def burst(self, kind: str, positions: Sequence[Pos], now: float,
+              stagger: float = 0.0) -> None:
+        """Серия эффектов; stagger — задержка между соседними (цепочка взрывов)."""
+        for k, pos in enumerate(positions):
+            self.pools[kind].spawn(pos, now, k * stagger)
+
+    def update(self, now: float) -> None:
+        for pool in self.pools.values():
+            pool.update(now)
+
+    def active(self) -> bool:
+        return any(pool.live for pool in self.pools.values())
+
+    def clear(self) -> None:
+        for pool in self.pools.values():
+            pool.clear()
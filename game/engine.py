@@ -0,0 +1,160 @@
+# game/engine.py
+"""
+Правила хода без Kivy: движение, столкновения, подбор, победа, ход врагов,
+телепорт и бомба над GameState.
+
+Функции меняют состояние и возвращают TurnResult со списком событий.
+Звуки, тряска, сохранения и диалоги — забота виджета/приложения, которые
+разбирают события. Так ход можно гонять без окна (tools/perf.py -k play_turn).
+"""
+import random
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from game.fieldcache import cached_distance_field
+from game.grid import FLOOR
+from game.logic import Pos, draw_random, enemy_turn, field_cells, neighbors4, try_move
+from game.profiler import profiler
+from game.state import GameState
+
+# ---- события хода ----
+
+TREASURE = "treasure"          # подобрано сокровище (pos)
+MEDKIT = "medkit"              # подобрана аптечка (pos)
+HIT = "hit"                    # столкновение с врагом (pos — где столкнулись)
+LEVEL_CLEARED = "cleared"      # уровень пройден (value — награда в кристаллах)
+GAME_OVER = "game_over"        # жизни кончились
+BOMB = "bomb"                  # бомба снесла стену (pos)
+NO_BOMBS = "no_bombs"          # бомбы нет
+NO_WALL = "no_wall"            # рядом нет стены для бомбы
+
+HIT_PENALTY = 15
+TREASURE_SCORE = 10
+MEDKIT_SCORE = 5
+
+
+@dataclass
+class TurnEvent:
+    kind: str
+    pos: Optional[Pos] = None
+    value: int = 0
+
+
+@dataclass
+class TurnResult:
+    acted: bool = False  # ход состоялся (False — уровень уже пройден)
+    events: List[TurnEvent] = field(default_factory=list)
+    enemies_before: Optional[List[Pos]] = None  # позиции врагов до их хода
+
+    def add(self, kind: str, pos: Optional[Pos] = None, value: int = 0) -> None:
+        self.events.append(TurnEvent(kind, pos, value))
+
+    def has(self, kind: str) -> bool:
+        return any(e.kind == kind for e in self.events)
+
+
+# ---- правила ----
+
+def teleport_enemy_far(st: GameState, hit_pos: Pos, rng: random.Random = random) -> None:
+    """Телепортирует врага(ов), стоявших в hit_pos, на далёкую от игрока клетку."""
+    if not st.walls or not st.cfg:
+        return
+
+    dist = cached_distance_field(st.walls, st.player)
+
+    min_safe = max(6, (st.walls.w + st.walls.h) // 4)
+    occupied = set(st.enemies)
+
+    # кандидаты — индексы; случайные берутся по одному без перемешивания всего списка
+    candidates = field_cells(dist, min_safe)
+
+    for i, e in enumerate(st.enemies):
+        if e == hit_pos:
+            occupied.discard(e)
+            while candidates:
+                c = st.walls.pos(draw_random(candidates, 1, rng)[0])
+                if c not in occupied:
+                    st.enemies[i] = c
+                    occupied.add(c)
+                    break
+
+
+def _collide(st: GameState, res: TurnResult, rng: random.Random) -> None:
+    hit_pos = st.player  # где столкнулись
+    st.lives -= 1
+    st.score = max(0, st.score - HIT_PENALTY)
+    st.player = st.start  # игрок возвращается на старт
+
+    # врагов, стоявших в hit_pos, — подальше от нового положения игрока
+    teleport_enemy_far(st, hit_pos, rng)
+
+    res.add(HIT, hit_pos)
+    if st.lives <= 0:
+        res.add(GAME_OVER)
+
+
+def play_turn(st: GameState, dx: int, dy: int, rng: random.Random = random) -> TurnResult:
+    """Ход игрока на (dx, dy) и ответный ход врагов."""
+    res = TurnResult()
+    if st.message:
+        return res
+    res.acted = True
+
+    st.player = try_move(st.walls, st.player, dx, dy)
+    # шаг на клетку врага — столкновение сразу, враги не ходят
+    if st.player in set(st.enemies):
+        _collide(st, res, rng)
+        if st.world is not None:
+            st.world.follow(st)
+        return res
+
+    if st.player in st.treasures:
+        st.treasures.remove(st.player)
+        st.score += TREASURE_SCORE
+        res.add(TREASURE, st.player)
+
+    if st.player in st.medkits:
+        st.medkits.remove(st.player)
+        st.lives = min(st.max_lives, st.lives + 1)
+        st.score += MEDKIT_SCORE
+        res.add(MEDKIT, st.player)
+
+    if st.player == st.goal and len(st.treasures) == 0:
+        st.score += 50 + st.level * 10
+        st.message = "Уровень пройден! (Next)"
+        res.add(LEVEL_CLEARED, st.goal, value=5 + st.level)
+        return res
+
+    res.enemies_before = list(st.enemies)
+    with profiler.phase("bfs"):
+        dist = cached_distance_field(st.walls, st.player)
+    with profiler.phase("enemy_turn"):
+        st.enemies = enemy_turn(st.walls, st.enemies, st.player, st.cfg.enemy_steps,
+                                dist=dist, horde=st.enemy_horde())
+
+    if st.player in set(st.enemies):
+        _collide(st, res, rng)
+    if st.world is not None:
+        st.world.follow(st)
+    return res
+
+
+def use_bomb(st: GameState, rng: random.Random = random) -> TurnResult:
+    """Бомба сносит случайную соседнюю стену (рамка поля не сносится)."""
+    res = TurnResult()
+    if st.bombs <= 0:
+        res.add(NO_BOMBS)
+        return res
+
+    targets = [p for p in neighbors4(st.player)
+               if st.walls.in_bounds(*p) and st.walls.is_wall(*p)]
+    if not targets:
+        res.add(NO_WALL)
+        return res
+
+    tx, ty = rng.choice(targets)
+    st.walls.set(tx, ty, FLOOR)
+    st.bombs -= 1
+    res.acted = True
+    res.add(BOMB, (tx, ty))
+    return res
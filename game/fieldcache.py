@@ -0,0 +1,123 @@
+# game/fieldcache.py
+"""
+Кэш полей расстояний: ключ — (версия стен, клетка-источник).
+
+Поле от клетки игрока нужно врагам в enemy_turn на каждом ходу и телепорту
+в teleport_enemy_far после удара. Повторный запрос от той же клетки на
+неизменной карте (упёрся в стену, вернулся на старт после удара) берётся
+из кэша. Если между запросами бомба превратила стену в пол, поле чинится
+локально (расстояния могут только уменьшиться), а не пересчитывается целиком.
+
+Поля хранятся только для текущей карты: запрос по другой Grid (новый
+уровень, снимок) сбрасывает кэш, и старая карта не держится в памяти.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from game.grid import FLOOR, Grid, Pos
+from game.logic import Field, distance_field
+
+# больше правок разом — проще пересчитать поле заново
+MAX_REPAIR_EDITS = 8
+
+# полей в кэше: память — FIELDS_PER_MAP списков по числу клеток карты
+# (уровень 32x18 — ~175 КБ, окно бесконечного режима 48x48 — ~650 КБ);
+# на случайном блуждании попаданий столько же, сколько при сотнях полей
+FIELDS_PER_MAP = 32
+
+
+@dataclass
+class _Entry:
+    walls: Grid
+    version: int
+    field: Field
+
+
+class DistanceFieldCache:
+    """Поля не копируются: возвращённое поле нельзя изменять."""
+
+    def __init__(self, capacity: int = FIELDS_PER_MAP):
+        self.capacity = capacity
+        self._walls: Optional[Grid] = None  # карта, к которой относятся поля
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.repairs = 0
+
+    def get(self, walls: Grid, source: Pos) -> Field:
+        if walls is not self._walls:
+            self.clear()
+            self._walls = walls
+        key = walls.idx(*source)
+        e = self._entries.get(key)
+        if e is not None and e.walls is walls:
+            if e.version == walls.version:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return e.field
+            edits = walls.edits_since(e.version)
+            if (edits is not None and len(edits) <= MAX_REPAIR_EDITS
+                    and all(new == FLOOR for _v, _i, _old, new in edits)):
+                for _v, i, _old, _new in edits:
+                    repair_opened(walls, e.field, i)
+                e.version = walls.version
+                self.repairs += 1
+                self._entries.move_to_end(key)
+                return e.field
+
+        self.misses += 1
+        field = distance_field(walls, source)
+        self._entries[key] = _Entry(walls, walls.version, field)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return field
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._walls = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "repairs": self.repairs}
+
+
+def repair_opened(walls: Grid, field: Field, i: int) -> None:
+    """
+    Чинит поле на месте после того, как клетка i стала полом.
+    Новая клетка получает min(соседи) + 1, затем волна уменьшений
+    расходится от неё, пока расстояния улучшаются.
+    """
+    cells = walls.cells
+    offsets = walls.offsets
+
+    best = -1
+    for off in offsets:
+        d = field[i + off]
+        if d >= 0 and not cells[i + off] and (best < 0 or d < best):
+            best = d
+    if best < 0:
+        return  # клетка открылась в недостижимой области
+    if 0 <= field[i] <= best + 1:
+        return
+    field[i] = best + 1
+
+    wave = [i]
+    for k in wave:
+        d = field[k] + 1
+        for off in offsets:
+            j = k + off
+            if cells[j]:
+                continue
+            old = field[j]
+            if old < 0 or old > d:
+                field[j] = d
+                wave.append(j)
+
+
+# общий кэш для хода врагов и телепорта после удара
+shared_cache = DistanceFieldCache()
+
+
+def cached_distance_field(walls: Grid, source: Pos) -> Field:
+    return shared_cache.get(walls, source)
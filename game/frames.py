@@ -0,0 +1,58 @@
+# game/frames.py
+"""
+Когда перерисовывать игровое поле.
+
+Тик приложения приходит 30 раз в секунду, но кадр нужен не всегда:
+  грязное поле (ход, жест камеры, смена уровня) — кадр сразу;
+  активные эффекты (взрыв, вспышка, тряска)   — каждый тик, FULL_FPS;
+  только покачивание и пульсация              — AMBIENT_FPS;
+  анимации выключены в настройках             — ни одного кадра без изменений.
+
+Счётчик fps — сколько кадров поля реально отрисовано за последнюю
+секунду (для F2), а не частота главного цикла Kivy.
+"""
+import time
+
+FULL_FPS = 30
+AMBIENT_FPS = 12
+
+
+class FrameScheduler:
+    def __init__(self, ambient_fps: float = AMBIENT_FPS):
+        self.animations = True      # настройка «Анимации»
+        self.dirty = True
+        self.ambient_dt = 1.0 / ambient_fps
+        self._since = 0.0           # с последнего кадра, по тикам
+        self.frames = 0             # всего отрисовано
+        self.fps = 0.0
+        self._fps_frames = 0
+        self._fps_t0 = time.perf_counter()
+
+    def invalidate(self) -> None:
+        self.dirty = True
+
+    def due(self, dt: float, active: bool) -> bool:
+        """Нужен ли кадр на этом тике; active — идут эффекты."""
+        self._since += dt
+        if self.dirty or active:
+            return True
+        if not self.animations:
+            return False
+        return self._since >= self.ambient_dt
+
+    def rendered(self) -> None:
+        self.dirty = False
+        self._since = 0.0
+        self.frames += 1
+        self._fps_frames += 1
+        now = time.perf_counter()
+        if now - self._fps_t0 >= 1.0:
+            self.fps = self._fps_frames / (now - self._fps_t0)
+            self._fps_frames = 0
+            self._fps_t0 = now
+
+    def current_fps(self) -> float:
+        """fps с поправкой на простой: без кадров больше секунды — 0."""
+        if time.perf_counter() - self._fps_t0 >= 2.0:
+            return 0.0
+        return self.fps
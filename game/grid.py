@@ -0,0 +1,159 @@
+# game/grid.py
+from typing import Iterable, List, Optional, Tuple
+
+Pos = Tuple[int, int]  # (x, y)
+
+FLOOR = 0
+WALL = 1
+
+# сколько последних правок помнит Grid (для точечной починки полей)
+EDIT_LOG_SIZE = 32
+
+Edit = Tuple[int, int, int, int]  # (версия после правки, индекс, было, стало)
+
+# 0/1 <-> b"0"/b"1" для упаковки стен в биты через int(..., 2)
+_TO_ASCII_BITS = bytes.maketrans(b"\x00\x01", b"01")
+_FROM_ASCII_BITS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def pack_bits(values: bytes) -> bytes:
+    """Байты 0/1 -> биты, младший бит первым."""
+    n = len(values)
+    if not n:
+        return b""
+    return int(values.translate(_TO_ASCII_BITS)[::-1], 2).to_bytes((n + 7) // 8, "little")
+
+
+def unpack_bits(data: bytes, n: int) -> bytes:
+    """Обратно к pack_bits: n байтов 0/1."""
+    if not n:
+        return b""
+    bits = format(int.from_bytes(data[:(n + 7) // 8], "little"), f"0{n}b")[::-1]
+    return bits.encode("ascii").translate(_FROM_ASCII_BITS)
+
+
+class Grid:
+    """
+    Плоская карта стен: bytearray (0 — пол, 1 — стена) с рамкой-стражем
+    шириной в одну клетку вокруг поля.
+
+    Клетка (x, y) хранится по индексу (y + 1) * stride + (x + 1), где
+    stride = w + 2. Рамка всегда стена, поэтому соседи любой клетки поля
+    (индекс ± 1, ± stride) существуют и проверки in_bounds во внутренних
+    циклах не нужны.
+
+    version растёт при каждой правке через set(); последние правки лежат
+    в edits, чтобы кэши полей расстояний могли обновиться точечно.
+    """
+
+    __slots__ = ("w", "h", "stride", "cells", "offsets", "version", "edits")
+
+    def __init__(self, w: int, h: int, fill: int = FLOOR):
+        self.w = w
+        self.h = h
+        self.stride = w + 2
+        self.cells = bytearray([WALL]) * (self.stride * (h + 2))
+        # порядок смещений совпадает с neighbors4: +x, -x, +y, -y
+        self.offsets = (1, -1, self.stride, -self.stride)
+        self.version = 0
+        self.edits: List[Edit] = []
+        row = bytes([fill]) * w
+        for y in range(h):
+            i = self.idx(0, y)
+            self.cells[i:i + w] = row
+
+    # ---- индексы ----
+
+    def idx(self, x: int, y: int) -> int:
+        return (y + 1) * self.stride + x + 1
+
+    def pos(self, i: int) -> Pos:
+        y, x = divmod(i, self.stride)
+        return x - 1, y - 1
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.w and 0 <= y < self.h
+
+    # ---- клетки ----
+
+    def is_wall(self, x: int, y: int) -> bool:
+        """Стена или клетка за пределами поля."""
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            return True
+        return self.cells[(y + 1) * self.stride + x + 1] != FLOOR
+
+    def set(self, x: int, y: int, value: int) -> None:
+        if not self.in_bounds(x, y):
+            raise IndexError(f"Клетка {(x, y)} вне поля {self.w}x{self.h}")
+        i = self.idx(x, y)
+        old = self.cells[i]
+        if old == value:
+            return
+        self.cells[i] = value
+        self.version += 1
+        self.edits.append((self.version, i, old, value))
+        if len(self.edits) > EDIT_LOG_SIZE:
+            del self.edits[0]
+
+    def edits_since(self, version: int) -> Optional[List[Edit]]:
+        """Правки после version; None, если журнал их уже не помнит."""
+        if version == self.version:
+            return []
+        if not self.edits or self.edits[0][0] > version + 1:
+            return None
+        return [e for e in self.edits if e[0] > version]
+
+    def row(self, y: int) -> bytearray:
+        """Копия строки y (без рамки-стража)."""
+        i = self.idx(0, y)
+        return self.cells[i:i + self.w]
+
+    # ---- конструирование / преобразование ----
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Iterable[str]]) -> "Grid":
+        """Из строк/списков символов '#' и '.' (старый формат List[List[str]])."""
+        rows = [list(r) for r in rows]
+        h = len(rows)
+        w = len(rows[0]) if h else 0
+        grid = cls(w, h)
+        for y, r in enumerate(rows):
+            i = grid.idx(0, y)
+            for x, ch in enumerate(r):
+                grid.cells[i + x] = WALL if ch == "#" else FLOOR
+        return grid
+
+    def pack_bits(self) -> bytes:
+        """Стены поля (без рамки-стража) по биту на клетку, построчно, младший бит первым."""
+        return pack_bits(b"".join(self.row(y) for y in range(self.h)))
+
+    @classmethod
+    def unpack_bits(cls, w: int, h: int, data: bytes) -> "Grid":
+        grid = cls(w, h)
+        values = unpack_bits(data, w * h)
+        for y in range(h):
+            i = grid.idx(0, y)
+            grid.cells[i:i + w] = values[y * w:(y + 1) * w]
+        return grid
+
+    def to_rows(self) -> List[str]:
+        return ["".join("#" if c else "." for c in self.row(y)) for y in range(self.h)]
+
+    def copy(self) -> "Grid":
+        g = Grid.__new__(Grid)
+        g.w = self.w
+        g.h = self.h
+        g.stride = self.stride
+        g.cells = bytearray(self.cells)
+        g.offsets = self.offsets
+        g.version = self.version
+        g.edits = []
+        return g
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Grid):
+            return NotImplemented
+        return self.w == other.w and self.h == other.h and self.cells == other.cells
+
+    def __repr__(self) -> str:
+        return f"Grid({self.w}x{self.h})"
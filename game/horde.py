@@ -0,0 +1,116 @@
+# game/horde.py
+"""
+Ход врагов пачкой: общий поток (flow field) к игроку + сетка занятости.
+
+Поток — градиент поля расстояний от игрока: из клетки с расстоянием d
+враг идёт к соседу с d - 1, если все такие заняты — к соседу с d, затем
+с d + 1 (при равенстве — порядок neighbors4). Градиент берётся прямо из
+поля, без промежуточных списков вариантов и сортировки, поэтому одно поле
+обслуживает любое число врагов.
+
+Враги ходят по очереди в порядке списка: это и есть детерминированное
+разрешение конфликтов — клетку получает тот, кто раньше в списке.
+Позиции — array индексов Grid, занятость — bytearray по клеткам Grid.
+
+Одна Horde живёт всю карту (GameState.enemy_horde): между ходами она
+только сверяет себя со списком st.enemies — его меняют бомба, телепорт
+и отмена хода — и пересобирает позиции, лишь если список разошёлся.
+"""
+import random
+from array import array
+from typing import List, Sequence, Tuple
+
+from game.grid import Grid, Pos
+
+
+class Horde:
+    """
+    Позиции и занятость врагов одного уровня; позиции можно заменить
+    целиком через set_positions (телепорт, откат) или sync.
+    """
+
+    def __init__(self, walls: Grid, enemies: Sequence[Pos] = ()):
+        self.walls = walls
+        self.pos = array("i")
+        self.occupied = bytearray(len(walls.cells))
+        self._last: Tuple[Pos, ...] = ()  # позиции, отданные positions() в последний раз
+        self.set_positions(enemies)
+
+    def sync(self, enemies: Sequence[Pos]) -> None:
+        """Принять список врагов снаружи; пересборка — только если он изменился."""
+        if tuple(enemies) != self._last:
+            self.set_positions(enemies)
+
+    def set_positions(self, enemies: Sequence[Pos]) -> None:
+        walls = self.walls
+        if len(self.occupied) != len(walls.cells):
+            self.occupied = bytearray(len(walls.cells))
+        else:
+            for i in self.pos:
+                self.occupied[i] = 0
+        self.pos = array("i", (walls.idx(x, y) for x, y in enemies))
+        for i in self.pos:
+            self.occupied[i] = 1
+        self._last = tuple(enemies)
+
+    def positions(self) -> List[Pos]:
+        pos = self.walls.pos
+        out = [pos(i) for i in self.pos]
+        self._last = tuple(out)
+        return out
+
+    def step(self, player: Pos, steps: int, dist: Sequence[int],
+             rng: random.Random = random) -> None:
+        """
+        Один ход всех врагов к player по полю dist (от клетки игрока).
+        Враг на клетке игрока стоит; враг, от которого игрок недостижим,
+        бродит случайно; за ход — до steps шагов.
+        """
+        walls = self.walls
+        cells = walls.cells
+        offsets = walls.offsets
+        o0, o1, o2, o3 = offsets
+        occupied = self.occupied
+        pos = self.pos
+        p_idx = walls.idx(*player)
+
+        for e in range(len(pos)):
+            cur = pos[e]
+            # как и раньше: занятость — множество клеток, а не счётчик
+            occupied[cur] = 0
+            if cur != p_idx:
+                for _ in range(steps):
+                    nxt = -1
+                    d = dist[cur]
+                    if d >= 0:
+                        # у стен и недостижимых клеток dist = -1, отдельная проверка не нужна
+                        for want in (d - 1, d, d + 1):
+                            j = cur + o0
+                            if dist[j] == want and not occupied[j]:
+                                nxt = j
+                                break
+                            j = cur + o1
+                            if dist[j] == want and not occupied[j]:
+                                nxt = j
+                                break
+                            j = cur + o2
+                            if dist[j] == want and not occupied[j]:
+                                nxt = j
+                                break
+                            j = cur + o3
+                            if dist[j] == want and not occupied[j]:
+                                nxt = j
+                                break
+                    else:
+                        # игрок недостижим — случайный свободный сосед
+                        opts = [cur + off for off in offsets
+                                if not cells[cur + off] and not occupied[cur + off]]
+                        if opts:
+                            nxt = rng.choice(opts)
+                    if nxt < 0:
+                        break
+                    cur = nxt
+                    if cur == p_idx:
+                        break
+                pos[e] = cur
+            occupied[cur] = 1
@@ -0,0 +1,316 @@
+# game/journal.py
+"""
+Журнал ходов для отмены и повтора на несколько шагов.
+
+Раньше перед каждым ходом копировалась вся карта стен и все коллекции,
+а отменить можно было один ход на уровень. Теперь begin() перед ходом
+запоминает только мелочи (счётчики, игрока, версию стен, позиции
+объектов — их единицы), а commit() после хода сохраняет разницу:
+  counters  — очки, жизни, бомбы до и после;
+  player    — клетка до и после (удар возвращает на старт);
+  cells     — изменённые клетки стен из журнала правок Grid (бомба);
+  treasures, medkits — убранные и добавленные позиции;
+  enemies   — (номер, было, стало) только для сдвинувшихся врагов,
+              включая телепортированных teleport_enemy_far.
+Память — пропорционально изменениям; записи лежат в кольцевом буфере
+на UNDO_DEPTH ходов, самые старые вытесняются.
+
+Стены при отмене и повторе меняются через Grid.set, поэтому кэш полей
+расстояний и рендерер обновляются точечно, как после бомбы.
+
+В снимок уровня (game/snapshot.py) журнал попадает двоичной секцией:
+запись каждого хода упаковывается один раз и дальше берётся готовой,
+а при восстановлении секция разбирается только при первой отмене или
+следующем ходе — запуск игры не ждёт разбора 64 записей.
+
+Если за ход сменилась сама карта (бесконечный режим сдвинул окно мира)
+или журнал правок Grid переполнился, разницу не восстановить — журнал
+очищается.
+"""
+import struct
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, FrozenSet, List, Optional, Tuple
+
+from game.grid import Grid, Pos
+from game.state import GameState
+
+UNDO_DEPTH = 64
+
+Counters = Tuple[int, int, int]  # очки, жизни, бомбы
+
+
+@dataclass
+class TurnDelta:
+    counters: Tuple[Counters, Counters]                 # до, после
+    player: Tuple[Pos, Pos]
+    cells: Tuple[Tuple[Pos, int, int], ...]             # (клетка, было, стало)
+    treasures: Tuple[Tuple[Pos, ...], Tuple[Pos, ...]]  # (убраны, добавлены)
+    medkits: Tuple[Tuple[Pos, ...], Tuple[Pos, ...]]
+    enemies: Tuple[Tuple[int, Pos, Pos], ...]           # (номер, было, стало)
+    # число врагов изменилось — тогда списки целиком (до, после)
+    enemies_full: Optional[Tuple[Tuple[Pos, ...], Tuple[Pos, ...]]] = None
+    # упакованная запись (ширина карты в журнале одного уровня не меняется)
+    packed: Optional[bytes] = field(default=None, compare=False, repr=False)
+
+
+@dataclass
+class _Before:
+    counters: Counters
+    player: Pos
+    walls: Grid
+    version: int
+    treasures: FrozenSet[Pos]
+    medkits: FrozenSet[Pos]
+    enemies: Tuple[Pos, ...]
+    origin: Optional[Pos]
+
+
+def _counters(st: GameState) -> Counters:
+    return st.score, st.lives, st.bombs
+
+
+def _origin(st: GameState) -> Optional[Pos]:
+    return st.world.origin if st.world is not None else None
+
+
+class UndoJournal:
+    def __init__(self, depth: int = UNDO_DEPTH):
+        self.undo: Deque[TurnDelta] = deque(maxlen=depth)
+        self.redo: List[TurnDelta] = []
+        self._before: Optional[_Before] = None
+        self._raw: Optional[Tuple[bytes, int]] = None  # неразобранная секция снимка и w
+
+    def clear(self) -> None:
+        self.undo.clear()
+        self.redo.clear()
+        self._before = None
+        self._raw = None
+
+    def can_undo(self) -> bool:
+        if self._raw is not None:
+            return self._raw_counts()[0] > 0
+        return bool(self.undo)
+
+    def can_redo(self) -> bool:
+        if self._raw is not None:
+            return self._raw_counts()[1] > 0
+        return bool(self.redo)
+
+    def _raw_counts(self) -> Tuple[int, int]:
+        """Число записей отмены/повтора по заголовку неразобранной секции (для кнопок HUD)."""
+        try:
+            return struct.unpack_from("<HH", self._raw[0])
+        except struct.error:
+            return 0, 0
+
+    # ---- запись хода ----
+
+    def begin(self, st: GameState) -> None:
+        """Перед ходом или бомбой."""
+        self._before = _Before(_counters(st), st.player, st.walls, st.walls.version,
+                               frozenset(st.treasures), frozenset(st.medkits),
+                               tuple(st.enemies), _origin(st))
+
+    def commit(self, st: GameState) -> Optional[TurnDelta]:
+        """После хода: запомнить разницу; None — ничего не изменилось."""
+        b, self._before = self._before, None
+        if b is None:
+            return None
+        self._load()
+        if st.walls is not b.walls or _origin(st) != b.origin:
+            self.clear()  # карта сменилась целиком
+            return None
+        edits = st.walls.edits_since(b.version)
+        if edits is None:
+            self.clear()
+            return None
+
+        pos = st.walls.pos
+        treasures = frozenset(st.treasures)
+        medkits = frozenset(st.medkits)
+        after = tuple(st.enemies)
+        moved: Tuple[Tuple[int, Pos, Pos], ...] = ()
+        full = None
+        if len(after) == len(b.enemies):
+            moved = tuple((k, e0, e1) for k, (e0, e1) in enumerate(zip(b.enemies, after))
+                          if e0 != e1)
+        else:
+            full = (b.enemies, after)
+
+        delta = TurnDelta(
+            counters=(b.counters, _counters(st)),
+            player=(b.player, st.player),
+            cells=tuple((pos(i), old, new) for _v, i, old, new in edits),
+            treasures=(tuple(b.treasures - treasures), tuple(treasures - b.treasures)),
+            medkits=(tuple(b.medkits - medkits), tuple(medkits - b.medkits)),
+            enemies=moved,
+            enemies_full=full,
+        )
+        if (delta.counters[0] == delta.counters[1] and b.player == st.player
+                and not (delta.cells or delta.treasures[0] or delta.treasures[1]
+                         or delta.medkits[0] or delta.medkits[1] or moved or full)):
+            return None
+        self.undo.append(delta)
+        self.redo.clear()
+        return delta
+
+    # ---- отмена / повтор ----
+
+    def undo_step(self, st: GameState) -> bool:
+        self._load()
+        if not self.undo:
+            return False
+        delta = self.undo.pop()
+        _apply(st, delta, forward=False)
+        self.redo.append(delta)
+        return True
+
+    def redo_step(self, st: GameState) -> bool:
+        self._load()
+        if not self.redo:
+            return False
+        delta = self.redo.pop()
+        _apply(st, delta, forward=True)
+        self.undo.append(delta)
+        return True
+
+    # ---- для снимка уровня (game/snapshot.py) ----
+
+    def pack(self, w: int) -> bytes:
+        if self._raw is not None and self._raw[1] == w:
+            return self._raw[0]  # с восстановления ничего не менялось
+        self._load()
+        out = [struct.pack("<HH", len(self.undo), len(self.redo))]
+        out.extend(_pack_delta(d, w) for d in self.undo)
+        out.extend(_pack_delta(d, w) for d in self.redo)
+        return b"".join(out)
+
+    @classmethod
+    def unpack(cls, data: bytes, w: int, depth: int = UNDO_DEPTH) -> "UndoJournal":
+        """Журнал из секции снимка; разбирается при первом обращении."""
+        j = cls(depth)
+        j._raw = (bytes(data), w)
+        return j
+
+    def _load(self) -> None:
+        if self._raw is None:
+            return
+        data, w = self._raw
+        self._raw = None
+        try:
+            n_undo, n_redo = struct.unpack_from("<HH", data)
+            off = 4
+            for _ in range(n_undo):
+                d, off = _unpack_delta(data, off, w)
+                self.undo.append(d)
+            for _ in range(n_redo):
+                d, off = _unpack_delta(data, off, w)
+                self.redo.append(d)
+        except (struct.error, ValueError, IndexError):
+            # битый журнал — без отмены, но уровень продолжается
+            self.undo.clear()
+            self.redo.clear()
+
+
+def _apply(st: GameState, d: TurnDelta, forward: bool) -> None:
+    k = 1 if forward else 0
+    st.score, st.lives, st.bombs = d.counters[k]
+    st.player = d.player[k]
+    for (x, y), old, new in (d.cells if forward else reversed(d.cells)):
+        st.walls.set(x, y, new if forward else old)
+
+    gone, back = d.treasures if forward else d.treasures[::-1]
+    st.treasures.difference_update(gone)
+    st.treasures.update(back)
+    gone, back = d.medkits if forward else d.medkits[::-1]
+    st.medkits.difference_update(gone)
+    st.medkits.update(back)
+
+    if d.enemies_full is not None:
+        st.enemies = list(d.enemies_full[k])
+    else:
+        enemies = list(st.enemies)
+        for i, e0, e1 in d.enemies:
+            enemies[i] = e1 if forward else e0
+        st.enemies = enemies
+    st.message = None
+
+
+# ---- двоичная запись: позиции индексами y * w + x ----
+
+_DELTA = struct.Struct("<iHHiHHII")  # счётчики до/после, игрок до/после
+
+
+def _pack_cells(ps, w: int) -> bytes:
+    ids = [y * w + x for x, y in ps]
+    return struct.pack(f"<H{len(ids)}I", len(ids), *ids)
+
+
+def _unpack_cells(data: bytes, off: int, w: int) -> Tuple[Tuple[Pos, ...], int]:
+    (n,) = struct.unpack_from("<H", data, off)
+    ids = struct.unpack_from(f"<{n}I", data, off + 2)
+    return tuple((i % w, i // w) for i in ids), off + 2 + 4 * n
+
+
+def _pack_delta(d: TurnDelta, w: int) -> bytes:
+    if d.packed is None:
+        d.packed = _encode_delta(d, w)
+    return d.packed
+
+
+def _encode_delta(d: TurnDelta, w: int) -> bytes:
+    (p0, p1) = d.player
+    out = [_DELTA.pack(*d.counters[0], *d.counters[1], p0[1] * w + p0[0], p1[1] * w + p1[0]),
+           struct.pack("<H", len(d.cells))]
+    out.extend(struct.pack("<IBB", y * w + x, old, new) for (x, y), old, new in d.cells)
+    for ps in (*d.treasures, *d.medkits):
+        out.append(_pack_cells(ps, w))
+    out.append(struct.pack("<H", len(d.enemies)))
+    out.extend(struct.pack("<HII", i, e0[1] * w + e0[0], e1[1] * w + e1[0])
+               for i, e0, e1 in d.enemies)
+    if d.enemies_full is None:
+        out.append(b"\x00")
+    else:
+        out.append(b"\x01")
+        out.extend(_pack_cells(ps, w) for ps in d.enemies_full)
+    return b"".join(out)
+
+
+def _unpack_delta(data: bytes, off: int, w: int) -> Tuple[TurnDelta, int]:
+    start = off
+    s0, l0, b0, s1, l1, b1, p0, p1 = _DELTA.unpack_from(data, off)
+    off += _DELTA.size
+
+    def at(i: int) -> Pos:
+        return i % w, i // w
+
+    (n,) = struct.unpack_from("<H", data, off)
+    off += 2
+    cells = []
+    for _ in range(n):
+        i, old, new = struct.unpack_from("<IBB", data, off)
+        off += 6
+        cells.append((at(i), old, new))
+    lists = []
+    for _ in range(4):
+        ps, off = _unpack_cells(data, off, w)
+        lists.append(ps)
+    (n,) = struct.unpack_from("<H", data, off)
+    off += 2
+    moved = []
+    for _ in range(n):
+        k, e0, e1 = struct.unpack_from("<HII", data, off)
+        off += 10
+        moved.append((k, at(e0), at(e1)))
+    full = None
+    if data[off]:
+        before, off = _unpack_cells(data, off + 1, w)
+        after, off = _unpack_cells(data, off, w)
+        full = (before, after)
+    else:
+        off += 1
+    d = TurnDelta(((s0, l0, b0), (s1, l1, b1)), (at(p0), at(p1)), tuple(cells),
+                  (lists[0], lists[1]), (lists[2], lists[3]), tuple(moved), full)
+    d.packed = data[start:off]
+    return d, off
@@ -0,0 +1,152 @@
+# game/levelcache.py
+"""
+Дисковый кэш раскладок уровней: (seed, LevelConfig) -> компактная запись.
+
+Запись — заголовок, стены по биту на клетку (Grid.pack_bits) и позиции
+старта, портала, сокровищ, аптечек и врагов индексами клеток y * w + x.
+Один файл на ключ; давно не использованные файлы удаляются, когда кэш
+превышает лимит по числу записей или байтам (LRU по mtime).
+
+Кэшируются только уровни, которые игрок начал: их seed лежит в прогрессе
+(save.json) и возвращается при запуске без снимка (game/snapshot.py) —
+снимка нет, он битый или от другой версии. Заготовки LevelPipeline живут
+в памяти: их seed свежий и второй раз не встретится.
+"""
+import hashlib
+import os
+import struct
+import threading
+from typing import List, Optional, Tuple
+
+from game.grid import Grid, Pos
+from game.logic import GENERATOR_VERSION, LevelConfig, LevelLayout, generate_level
+
+MAGIC = b"LVL"
+FORMAT_VERSION = 1
+
+# magic, формат, версия генератора, seed, w, h, wall_prob * 1e4,
+# treasures, enemies, medkits, enemy_steps, ширина индекса (2 или 4 байта)
+_HEADER = struct.Struct("<3sBHQHHHHHHHB")
+
+
+def _key(seed: int, cfg: LevelConfig) -> Tuple:
+    return (GENERATOR_VERSION, seed & 0xFFFFFFFFFFFFFFFF, cfg.w, cfg.h,
+            round(cfg.wall_prob * 10000), cfg.treasures, cfg.enemies, cfg.medkits,
+            cfg.enemy_steps)
+
+
+def pack_layout(seed: int, cfg: LevelConfig, layout: LevelLayout) -> bytes:
+    walls, start, goal, treasures, medkits, enemies = layout
+    wide = cfg.w * cfg.h > 0xFFFF
+    fmt = "I" if wide else "H"
+    k = _key(seed, cfg)
+
+    def cells(ps) -> bytes:
+        ps = list(ps)
+        return struct.pack(f"<H{len(ps)}{fmt}", len(ps), *(y * cfg.w + x for x, y in ps))
+
+    return b"".join((
+        _HEADER.pack(MAGIC, FORMAT_VERSION, *k, 4 if wide else 2),
+        walls.pack_bits(),
+        cells((start, goal)),
+        cells(sorted(treasures)),
+        cells(sorted(medkits)),
+        cells(enemies),
+    ))
+
+
+def unpack_layout(data: bytes, seed: int, cfg: LevelConfig) -> Optional[LevelLayout]:
+    """None, если запись битая или от другого ключа/версии."""
+    try:
+        head = _HEADER.unpack_from(data)
+        magic, fmt_version, *k, width = head
+        if magic != MAGIC or fmt_version != FORMAT_VERSION or tuple(k) != _key(seed, cfg):
+            return None
+        fmt = "I" if width == 4 else "H"
+        off = _HEADER.size
+        walls = Grid.unpack_bits(cfg.w, cfg.h, data[off:])
+        off += (cfg.w * cfg.h + 7) // 8
+
+        groups: List[List[Pos]] = []
+        for _ in range(4):  # старт+портал, сокровища, аптечки, враги
+            (count,) = struct.unpack_from("<H", data, off)
+            off += 2
+            ids = struct.unpack_from(f"<{count}{fmt}", data, off)
+            off += count * width
+            groups.append([(i % cfg.w, i // cfg.w) for i in ids])
+        (start, goal), treasures, medkits, enemies = groups
+    except (struct.error, ValueError):
+        return None
+    return walls, start, goal, set(treasures), set(medkits), enemies
+
+
+class LevelCache:
+    def __init__(self, directory: str, max_entries: int = 8, max_bytes: int = 64 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()  # кэшем пользуется и поток LevelPipeline
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, seed: int, cfg: LevelConfig) -> str:
+        digest = hashlib.sha1(repr(_key(seed, cfg)).encode()).hexdigest()[:20]
+        return os.path.join(self.directory, f"{digest}.lvl")
+
+    def get(self, seed: int, cfg: LevelConfig) -> Optional[LevelLayout]:
+        path = self._path(seed, cfg)
+        with self._lock:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                os.utime(path)  # отметка для LRU
+            except OSError:
+                return None
+        return unpack_layout(data, seed, cfg)
+
+    def put(self, seed: int, cfg: LevelConfig, layout: LevelLayout) -> None:
+        self.write(seed, cfg, pack_layout(seed, cfg, layout))
+
+    def write(self, seed: int, cfg: LevelConfig, data: bytes) -> None:
+        """Готовая запись pack_layout: упаковать можно в игровом потоке, а писать в фоне."""
+        path = self._path(seed, cfg)
+        tmp = path + ".tmp"
+        with self._lock:
+            try:
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except OSError:
+                return
+            self._evict()
+
+    def get_or_generate(self, seed: int, cfg: LevelConfig) -> LevelLayout:
+        layout = self.get(seed, cfg)
+        if layout is not None:
+            self.hits += 1
+            return layout
+        self.misses += 1
+        layout = generate_level(cfg, seed=seed)
+        self.put(seed, cfg, layout)
+        return layout
+
+    def _evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".lvl"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        entries.sort()
+        total = sum(size for _t, size, _n in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _t, size, name = entries.pop(0)
+            total -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
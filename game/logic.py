@@ -1,10 +1,27 @@
 # logic.py
 import random
+import time
 from dataclasses import dataclass
-from collections import deque
-from typing import Deque, Dict, List, Optional, Set, Tuple
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
-Pos = Tuple[int, int]  # (x, y)
+from game import pathfind, wavefront
+from game.grid import FLOOR, WALL, Grid, Pos
+from game.horde import Horde
+from game.trace import tracer, traced
+
+# Плотное поле расстояний по индексам Grid (-1 — недостижимо):
+# list на чистом Python или np.ndarray(int32) от wavefront.
+Field = Sequence[int]
+
+FIELD_BACKENDS = ("auto", "python", "numpy")
+# на картах меньше этого (в клетках с рамкой) чистый BFS быстрее NumPy
+NUMPY_MIN_CELLS = 40_000
+
+_field_backend = "auto"
+
+GEN_MAX_ATTEMPTS = 300
+# меняется вместе с алгоритмом генерации: тот же seed даёт другую карту
+GENERATOR_VERSION = 2
 
 
 def in_bounds(x: int, y: int, w: int, h: int) -> bool:
@@ -16,69 +33,153 @@ def neighbors4(p: Pos) -> List[Pos]:
     return [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
 
 
-def bfs_prev_map(walls: List[List[str]], start: Pos) -> Dict[Pos, Optional[Pos]]:
-    """BFS по проходимым клеткам. Карта prev для восстановления пути."""
-    h = len(walls)
-    w = len(walls[0]) if h else 0
-
-    q: Deque[Pos] = deque([start])
-    prev: Dict[Pos, Optional[Pos]] = {start: None}
-
-    while q:
-        cur = q.popleft()
-        x, y = cur
-        for nx, ny in neighbors4(cur):
-            if not in_bounds(nx, ny, w, h):
-                continue
-            if walls[ny][nx] == "#":
-                continue
-            nxt = (nx, ny)
-            if nxt in prev:
-                continue
-            prev[nxt] = cur
-            q.append(nxt)
-
-    return prev
-
-
-def bfs_distances(walls: List[List[str]], start: Pos) -> Dict[Pos, int]:
-    """{клетка: расстояние по шагам от start} по проходимым клеткам."""
-    h = len(walls)
-    w = len(walls[0]) if h else 0
-
-    q: Deque[Pos] = deque([start])
-    dist: Dict[Pos, int] = {start: 0}
-
-    while q:
-        x, y = q.popleft()
-        d = dist[(x, y)]
-        for nx, ny in neighbors4((x, y)):
-            if not in_bounds(nx, ny, w, h):
-                continue
-            if walls[ny][nx] == "#":
-                continue
-            p = (nx, ny)
-            if p in dist:
-                continue
-            dist[p] = d + 1
-            q.append(p)
-
+def bfs_field(walls: Grid, start: Pos) -> Tuple[List[int], List[int]]:
+    """
+    BFS по индексам Grid без аллокаций во внутреннем цикле.
+    Возвращает (dist, order): dist[i] — расстояние до клетки i (-1 — недостижима),
+    order — индексы в порядке обхода.
+    """
+    cells = walls.cells
+    dist = [-1] * len(cells)
+    s = walls.idx(*start)
+    dist[s] = 0
+    order = [s]
+    stride = walls.stride
+
+    # список растёт во время итерации — это и есть очередь BFS
+    for i in order:
+        d = dist[i] + 1
+        j = i + 1
+        if not cells[j] and dist[j] < 0:
+            dist[j] = d
+            order.append(j)
+        j = i - 1
+        if not cells[j] and dist[j] < 0:
+            dist[j] = d
+            order.append(j)
+        j = i + stride
+        if not cells[j] and dist[j] < 0:
+            dist[j] = d
+            order.append(j)
+        j = i - stride
+        if not cells[j] and dist[j] < 0:
+            dist[j] = d
+            order.append(j)
+
+    return dist, order
+
+
+def bfs_prev_field(walls: Grid, start: Pos) -> Tuple[List[int], List[int]]:
+    """Как bfs_field, но prev[i] — индекс предыдущей клетки пути (-1 — нет/старт)."""
+    cells = walls.cells
+    prev = [-2] * len(cells)  # -2 — не посещена
+    s = walls.idx(*start)
+    prev[s] = -1
+    order = [s]
+    stride = walls.stride
+
+    for i in order:
+        j = i + 1
+        if not cells[j] and prev[j] == -2:
+            prev[j] = i
+            order.append(j)
+        j = i - 1
+        if not cells[j] and prev[j] == -2:
+            prev[j] = i
+            order.append(j)
+        j = i + stride
+        if not cells[j] and prev[j] == -2:
+            prev[j] = i
+            order.append(j)
+        j = i - stride
+        if not cells[j] and prev[j] == -2:
+            prev[j] = i
+            order.append(j)
+
+    return prev, order
+
+
+# ---- выбор движка полей расстояний ----
+
+def set_field_backend(name: str) -> None:
+    """"python", "numpy" или "auto" (NumPy только на больших картах, если установлен)."""
+    global _field_backend
+    if name not in FIELD_BACKENDS:
+        raise ValueError(f"Неизвестный движок полей: {name!r}")
+    if name == "numpy" and not wavefront.available():
+        raise RuntimeError("NumPy недоступен в этой сборке.")
+    _field_backend = name
+
+
+def get_field_backend() -> str:
+    return _field_backend
+
+
+def _use_numpy(n_cells: int) -> bool:
+    """n_cells — размер карты в клетках вместе с рамкой-стражем."""
+    if _field_backend == "python" or not wavefront.available():
+        return False
+    if _field_backend == "numpy":
+        return True
+    return n_cells >= NUMPY_MIN_CELLS
+
+
+def distance_field(walls: Grid, start: Pos) -> Field:
+    """Плотное поле расстояний от start выбранным движком."""
+    if _use_numpy(len(walls.cells)):
+        field = wavefront.distance_field(walls, start)
+        if tracer.enabled:
+            tracer.counter("bfs", nodes=int(wavefront.np.count_nonzero(field >= 0)))
+        return field
+    dist, order = bfs_field(walls, start)
+    if tracer.enabled:
+        tracer.counter("bfs", nodes=len(order))  # раскрыто клеток
     return dist
 
 
-def bfs_next_step(walls: List[List[str]], start: Pos, goal: Pos) -> Optional[Pos]:
-    """Следующий шаг из start к goal по кратчайшему пути. None, если пути нет."""
+def field_cells(field: Field, min_dist: int = 0) -> List[int]:
+    """Индексы клеток поля с расстоянием >= min_dist (по возрастанию индекса)."""
+    if wavefront.is_array(field):
+        return wavefront.np.flatnonzero(field >= min_dist).tolist()
+    return [i for i, d in enumerate(field) if d >= min_dist]
+
+
+def bfs_prev_map(walls: Grid, start: Pos) -> Dict[Pos, Optional[Pos]]:
+    """BFS по проходимым клеткам. Карта prev для восстановления пути."""
+    if not walls.in_bounds(*start):
+        return {start: None}
+    pos = walls.pos
+    if _use_numpy(len(walls.cells)):
+        _dist, prev = wavefront.prev_field(walls, start)
+        order = field_cells(prev, -1)
+    else:
+        prev, order = bfs_prev_field(walls, start)
+    return {pos(i): (pos(int(prev[i])) if prev[i] >= 0 else None) for i in order}
+
+
+def bfs_distances(walls: Grid, start: Pos) -> Dict[Pos, int]:
+    """
+    {клетка: расстояние по шагам от start} по проходимым клеткам.
+    На NumPy-движке ключи идут по возрастанию индекса, а не в порядке обхода.
+    """
+    if not walls.in_bounds(*start):
+        return {start: 0}
+    pos = walls.pos
+    if _use_numpy(len(walls.cells)):
+        dist = wavefront.distance_field(walls, start)
+        return {pos(i): int(dist[i]) for i in field_cells(dist)}
+    dist, order = bfs_field(walls, start)
+    return {pos(i): dist[i] for i in order}
+
+
+def bfs_next_step(walls: Grid, start: Pos, goal: Pos) -> Optional[Pos]:
+    """
+    Следующий шаг из start к goal по кратчайшему пути. None, если пути нет.
+    Считается целевым поиском (pathfind), а не заливкой всей карты.
+    """
     if start == goal:
         return start
-    prev = bfs_prev_map(walls, start)
-    if goal not in prev:
-        return None
-    cur = goal
-    while prev[cur] != start:
-        cur = prev[cur]  # type: ignore[assignment]
-        if cur is None:
-            return None
-    return cur
+    return pathfind.next_step(walls, start, goal)
 
 
 @dataclass
@@ -105,153 +206,157 @@ def level_config(level: int) -> LevelConfig:
     return LevelConfig(w, h, wall_prob, treasures, enemies, medkits, enemy_steps)
 
 
-def pick_random(reachable: List[Pos], forbidden: Set[Pos]) -> Pos:
-    choices = [p for p in reachable if p not in forbidden]
-    if not choices:
+def draw_random(pool: List[int], k: int, rng: random.Random = random) -> List[int]:
+    """
+    k случайных элементов pool без повторов (частичное перемешивание
+    Фишера–Йетса с конца списка). Вынутые элементы отрезаются от pool,
+    поэтому следующий вызов продолжает тянуть из оставшихся: O(k) на вызов.
+    """
+    n = len(pool)
+    if k > n:
         raise RuntimeError("Нет доступных клеток для размещения объекта.")
-    return random.choice(choices)
+    randrange = rng.randrange
+    for last in range(n - 1, n - 1 - k, -1):
+        r = randrange(last + 1)
+        pool[r], pool[last] = pool[last], pool[r]
+    drawn = pool[n - k:]
+    del pool[n - k:]
+    return drawn
+
+
+def place_objects(order: Sequence[int], dist: Field, cfg: LevelConfig, forbidden: Set[int],
+                  rng: random.Random = random) -> Optional[Tuple[List[int], List[int], List[int]]]:
+    """
+    Индексы (сокровища, аптечки, враги) среди достижимых клеток order,
+    без пересечений друг с другом и с forbidden; None — врагов не разместить.
+
+    Пул свободных клеток строится один раз. Сокровища и аптечки тянутся из
+    него равномерно, остаток делится на корзины по расстоянию от старта:
+    враги берутся из дальней (dist >= primary_min), а когда она кончится —
+    из средней (dist >= secondary_min), как и раньше.
+    """
+    primary_min = max(6, (cfg.w + cfg.h) // 4)
+    secondary_min = 3
+
+    pool = [i for i in order if i not in forbidden]
+    treasures = draw_random(pool, cfg.treasures, rng)
+    medkits = draw_random(pool, cfg.medkits, rng)
+
+    far: List[int] = []
+    mid: List[int] = []
+    for i in pool:
+        d = dist[i]
+        if d >= primary_min:
+            far.append(i)
+        elif d >= secondary_min:
+            mid.append(i)
+
+    if len(far) + len(mid) < cfg.enemies:
+        return None
+    n_far = min(cfg.enemies, len(far))
+    enemies = draw_random(far, n_far, rng) + draw_random(mid, cfg.enemies - n_far, rng)
+    return treasures, medkits, enemies
 
 
-def generate_level(cfg: LevelConfig) -> Tuple[
-    List[List[str]], Pos, Pos, Set[Pos], Set[Pos], List[Pos]
-]:
-    """Генерация уровня: гарантируем путь до выхода и безопасную дистанцию до врагов."""
+@dataclass
+class GenStats:
+    """Статистика одного вызова generate_level (для замеров)."""
+    attempts: int = 0    # карт-кандидатов проверено до принятия
+    seconds: float = 0.0
+    sample_seconds: float = 0.0  # из них на выборку стен и проверку связности
+
+
+def wall_table(wall_prob: float) -> bytes:
+    """Таблица для bytes.translate: случайный байт -> WALL/FLOOR (шаг 1/256)."""
+    thr = round(wall_prob * 256)
+    return bytes(WALL if b < thr else FLOOR for b in range(256))
+
+
+def _sample_walls(cfg: LevelConfig, start: Pos, goal: Pos, table: bytes,
+                  rng: random.Random) -> Grid:
+    """Вся маска стен одним вызовом randbytes, без random.random() на клетку."""
+    walls = Grid(cfg.w, cfg.h, fill=WALL)
+    cells = walls.cells
+    iw = cfg.w - 2
+    noise = rng.randbytes(iw * (cfg.h - 2)).translate(table)
+    for y in range(1, cfg.h - 1):
+        i = walls.idx(1, y)
+        k = (y - 1) * iw
+        cells[i:i + iw] = noise[k:k + iw]
+    cells[walls.idx(*start)] = FLOOR
+    cells[walls.idx(*goal)] = FLOOR
+    return walls
+
+
+# (стены, старт, портал, сокровища, аптечки, враги)
+LevelLayout = Tuple[Grid, Pos, Pos, Set[Pos], Set[Pos], List[Pos]]
+
+
+@traced()
+def generate_level(cfg: LevelConfig, stats: Optional[GenStats] = None,
+                   seed: Optional[int] = None) -> LevelLayout:
+    """
+    Генерация уровня: гарантируем путь до выхода и безопасную дистанцию до врагов.
+    stats (если передан) заполняется числом попыток и временем генерации.
+    С seed уровень воспроизводим (при той же GENERATOR_VERSION; движок полей
+    на раскладку не влияет), без него берётся глобальный random.
+    """
+    t0 = time.perf_counter()
+    if stats is None:
+        stats = GenStats()
+    rng = random.Random(seed) if seed is not None else random
     start = (1, 1)
     goal = (cfg.w - 2, cfg.h - 2)
 
+    table = wall_table(cfg.wall_prob)
     attempts = 0
     while True:
         attempts += 1
-        if attempts > 300:
+        if attempts > GEN_MAX_ATTEMPTS:
             raise RuntimeError("Не удалось сгенерировать уровень. Попробуй уменьшить wall_prob.")
-
-        walls = [["." for _ in range(cfg.w)] for _ in range(cfg.h)]
-
-        # рамка
-        for x in range(cfg.w):
-            walls[0][x] = "#"
-            walls[cfg.h - 1][x] = "#"
-        for y in range(cfg.h):
-            walls[y][0] = "#"
-            walls[y][cfg.w - 1] = "#"
-
-        # случайные стены
-        for y in range(1, cfg.h - 1):
-            for x in range(1, cfg.w - 1):
-                if random.random() < cfg.wall_prob:
-                    walls[y][x] = "#"
-
-        walls[start[1]][start[0]] = "."
-        walls[goal[1]][goal[0]] = "."
-
-        dist = bfs_distances(walls, start)
-        if goal not in dist:
+        walls = _sample_walls(cfg, start, goal, table, rng)
+        dist = distance_field(walls, start)
+        if dist[walls.idx(*goal)] < 0:
             continue
+        stats.sample_seconds = time.perf_counter() - t0
 
-        reachable = list(dist.keys())
+        order = field_cells(dist)
         need = cfg.treasures + cfg.medkits + cfg.enemies + 2
-        if len(reachable) < need:
+        if len(order) < need:
             continue
 
-        forbidden: Set[Pos] = {start, goal}
-
-        # сокровища
-        treasures: Set[Pos] = set()
-        for _ in range(cfg.treasures):
-            t = pick_random(reachable, forbidden)
-            treasures.add(t)
-            forbidden.add(t)
-
-        # аптечки
-        medkits: Set[Pos] = set()
-        for _ in range(cfg.medkits):
-            m = pick_random(reachable, forbidden)
-            medkits.add(m)
-            forbidden.add(m)
-
-        # враги — далеко от старта
-        enemies: List[Pos] = []
-        primary_min = max(6, (cfg.w + cfg.h) // 4)
-        secondary_min = 3
-
-        for _ in range(cfg.enemies):
-            far = [p for p in reachable
-                   if p not in forbidden and dist.get(p, 0) >= primary_min]
-            if not far:
-                far = [p for p in reachable
-                       if p not in forbidden and dist.get(p, 0) >= secondary_min]
-            if not far:
-                enemies = []
-                break
-            e = random.choice(far)
-            enemies.append(e)
-            forbidden.add(e)
-
-        if len(enemies) < cfg.enemies:
+        placed = place_objects(order, dist, cfg, {walls.idx(*start), walls.idx(*goal)}, rng)
+        if placed is None:
             continue
+        treasures, medkits, enemies = ([walls.pos(i) for i in group] for group in placed)
 
-        return walls, start, goal, treasures, medkits, enemies
+        stats.attempts = attempts
+        stats.seconds = time.perf_counter() - t0
+        if tracer.enabled:
+            tracer.counter("generate_level", attempts=attempts)
+        return walls, start, goal, set(treasures), set(medkits), enemies
 
 
-def try_move(walls: List[List[str]], pos: Pos, dx: int, dy: int) -> Pos:
+def try_move(walls: Grid, pos: Pos, dx: int, dy: int) -> Pos:
     x, y = pos
     nx, ny = x + dx, y + dy
-    h = len(walls)
-    w = len(walls[0]) if h else 0
-    if not in_bounds(nx, ny, w, h):
-        return pos
-    if walls[ny][nx] == "#":
+    if walls.is_wall(nx, ny):
         return pos
     return (nx, ny)
 
 
-def enemy_turn(walls: List[List[str]], enemies: List[Pos], player: Pos, steps: int) -> List[Pos]:
-    dist = bfs_distances(walls, player)  # один BFS на всех
-    h = len(walls)
-    w = len(walls[0]) if h else 0
-
-    new_positions: List[Pos] = []
-    occupied = set(enemies)
-
-    INF = 10**9
-
-    for e in enemies:
-        occupied.discard(e)
-        cur = e
-        # если враг уже стоит на игроке — не двигаем его "с клетки игрока"
-        if cur == player:
-            new_positions.append(cur)
-            occupied.add(cur)
-            continue
-
-        for _ in range(steps):
-            opts: List[Pos] = []
-            for nx, ny in neighbors4(cur):
-                if not in_bounds(nx, ny, w, h):
-                    continue
-                if walls[ny][nx] == "#":
-                    continue
-                p = (nx, ny)
-                if p in occupied:
-                    continue
-                opts.append(p)
-
-            if not opts:
-                break
-
-            # идём туда, где ближе к игроку
-            opts.sort(key=lambda p: dist.get(p, INF))
-            best = opts[0]
-
-            # если игрок недостижим (dist нет) — ходим случайно
-            if dist.get(best, INF) >= INF:
-                best = random.choice(opts)
-
-            cur = best
-            if cur == player:
-                break
-
-        new_positions.append(cur)
-        occupied.add(cur)
-
-    return new_positions
\ No newline at end of file
+def enemy_turn(walls: Grid, enemies: List[Pos], player: Pos, steps: int,
+               dist: Optional[Field] = None, horde: Optional[Horde] = None) -> List[Pos]:
+    """
+    Ход всех врагов (см. game.horde). dist — готовое поле расстояний от
+    player (если уже посчитано), horde — Horde этой карты (GameState.enemy_horde);
+    без неё собирается временная.
+    """
+    if dist is None:
+        dist = distance_field(walls, player)  # один BFS на всех
+    if horde is None:
+        horde = Horde(walls, enemies)
+    else:
+        horde.sync(enemies)
+    horde.step(player, steps, dist)
+    return horde.positions()
@@ -0,0 +1,264 @@
+# game/pathfind.py
+"""
+Поиск пути между двумя клетками: A* с манхэттенской эвристикой и
+jump point search (JPS) для 4-связной сетки с одинаковой ценой шага.
+
+В отличие от bfs_prev_map, поиск идёт к цели и останавливается, как только
+цель снята из очереди. Буферы (g, parent, отметки посещения) живут в
+PathFinder и переиспользуются между запросами: вместо очистки массивов
+увеличивается номер поколения.
+"""
+import heapq
+from typing import List, Optional
+
+from game.grid import Grid, Pos
+
+METHODS = ("astar", "jps")
+
+
+class PathFinder:
+    def __init__(self):
+        self._n = 0
+        self._g: List[int] = []
+        self._parent: List[int] = []
+        self._seen: List[int] = []    # поколение, в котором клетка получила g
+        self._closed: List[int] = []  # поколение, в котором клетка раскрыта
+        self._gen = 0
+        self.expanded = 0             # раскрытых узлов в последнем запросе
+
+    def _prepare(self, walls: Grid) -> None:
+        n = len(walls.cells)
+        if n != self._n:
+            self._n = n
+            self._g = [0] * n
+            self._parent = [-1] * n
+            self._seen = [0] * n
+            self._closed = [0] * n
+            self._gen = 0
+        self._gen += 1
+        self.expanded = 0
+
+    # ---- публичные запросы ----
+
+    def find_path(self, walls: Grid, start: Pos, goal: Pos,
+                  method: str = "astar") -> Optional[List[Pos]]:
+        """Кратчайший путь [start, ..., goal] или None, если пути нет."""
+        if method not in METHODS:
+            raise ValueError(f"Неизвестный метод поиска: {method!r}")
+        if not walls.in_bounds(*start) or not walls.in_bounds(*goal):
+            return None
+        if start == goal:
+            return [start]
+        s = walls.idx(*start)
+        t = walls.idx(*goal)
+        if walls.cells[t]:
+            return None
+
+        self._prepare(walls)
+        if method == "astar":
+            found = self._astar(walls, s, t)
+        else:
+            found = self._jps(walls, s, t)
+        if not found:
+            return None
+        return [walls.pos(i) for i in self._unroll(walls, s, t)]
+
+    def next_step(self, walls: Grid, start: Pos, goal: Pos,
+                  method: str = "astar") -> Optional[Pos]:
+        """Первый шаг кратчайшего пути (start, если уже на месте; None — пути нет)."""
+        path = self.find_path(walls, start, goal, method)
+        if path is None:
+            return None
+        return path[1] if len(path) > 1 else start
+
+    # ---- восстановление пути ----
+
+    def _unroll(self, walls: Grid, s: int, t: int) -> List[int]:
+        """Цепочка parent от t к s, отрезки между узлами разворачиваются по клеткам."""
+        parent = self._parent
+        stride = walls.stride
+        out = [t]
+        cur = t
+        while cur != s:
+            p = parent[cur]
+            # узлы JPS лежат на одной линии: шагаем от cur к p по одной клетке
+            if (cur - p) % stride == 0:
+                step = stride if p > cur else -stride
+            else:
+                step = 1 if p > cur else -1
+            while cur != p:
+                cur += step
+                out.append(cur)
+        out.reverse()
+        return out
+
+    # ---- A* ----
+    #
+    # Цена шага 1 и манхэттенская эвристика: f соседа равна f узла или f + 2.
+    # Поэтому вместо кучи — очередь корзин по f (две активные корзины),
+    # внутри корзины LIFO, что даёт предпочтение более глубоким узлам.
+
+    def _astar(self, walls: Grid, s: int, t: int) -> bool:
+        cells = walls.cells
+        stride = walls.stride
+        offsets = walls.offsets
+        g = self._g
+        parent = self._parent
+        seen = self._seen
+        closed = self._closed
+        gen = self._gen
+        ty, tx = divmod(t, stride)
+
+        g[s] = 0
+        parent[s] = -1
+        seen[s] = gen
+        sy, sx = divmod(s, stride)
+        f = abs(sx - tx) + abs(sy - ty)
+        cur: List[int] = [s]   # корзина f
+        nxt: List[int] = []    # корзина f + 2
+        expanded = 0
+
+        while cur or nxt:
+            if not cur:
+                cur, nxt = nxt, cur
+                f += 2
+            i = cur.pop()
+            if closed[i] == gen:
+                continue
+            closed[i] = gen
+            expanded += 1
+            if i == t:
+                self.expanded = expanded
+                return True
+            gi = g[i] + 1
+            for off in offsets:
+                j = i + off
+                if cells[j] or closed[j] == gen:
+                    continue
+                if seen[j] != gen or gi < g[j]:
+                    seen[j] = gen
+                    g[j] = gi
+                    parent[j] = i
+                    jy, jx = divmod(j, stride)
+                    if gi + abs(jx - tx) + abs(jy - ty) == f:
+                        cur.append(j)
+                    else:
+                        nxt.append(j)
+
+        self.expanded = expanded
+        return False
+
+    # ---- JPS ----
+    #
+    # Каноничный порядок путей: вертикальные шаги «ведут», горизонтальные
+    # идут прямо. Горизонтальный прыжок останавливается в клетке с вынужденным
+    # соседом сверху/снизу (клетка над/под ней свободна, а над/под предыдущей —
+    # стена). Вертикальный прыжок в каждой клетке пробует горизонтальные прыжки
+    # в обе стороны и останавливается, если хотя бы один что-то нашёл.
+
+    def _jump_h(self, cells, i: int, dx: int, t: int, stride: int) -> int:
+        while True:
+            j = i + dx
+            if cells[j]:
+                return -1
+            if j == t:
+                return j
+            if (not cells[j + stride] and cells[i + stride]) or \
+                    (not cells[j - stride] and cells[i - stride]):
+                return j
+            i = j
+
+    def _jump_v(self, cells, i: int, dy: int, t: int, stride: int) -> int:
+        while True:
+            j = i + dy
+            if cells[j]:
+                return -1
+            if j == t:
+                return j
+            if self._jump_h(cells, j, 1, t, stride) >= 0 or \
+                    self._jump_h(cells, j, -1, t, stride) >= 0:
+                return j
+            i = j
+
+    def _jps(self, walls: Grid, s: int, t: int) -> bool:
+        cells = walls.cells
+        stride = walls.stride
+        g = self._g
+        parent = self._parent
+        seen = self._seen
+        closed = self._closed
+        gen = self._gen
+        n = self._n
+        ty, tx = divmod(t, stride)
+        jump_h = self._jump_h
+        jump_v = self._jump_v
+
+        def key(i: int, gi: int) -> int:
+            y, x = divmod(i, stride)
+            f = gi + abs(x - tx) + abs(y - ty)
+            return (f * n + (n - gi)) * n + i
+
+        g[s] = 0
+        parent[s] = -1
+        seen[s] = gen
+        heap = [key(s, 0)]
+        expanded = 0
+
+        while heap:
+            i = heapq.heappop(heap) % n
+            if closed[i] == gen:
+                continue
+            closed[i] = gen
+            expanded += 1
+            if i == t:
+                self.expanded = expanded
+                return True
+
+            p = parent[i]
+            if p < 0:
+                dirs = (1, -1, stride, -stride)
+            else:
+                d = i - p
+                if d % stride == 0:
+                    # пришли вертикально: вперёд и обе горизонтали
+                    dv = stride if d > 0 else -stride
+                    dirs = (dv, 1, -1)
+                else:
+                    # пришли горизонтально: вперёд + вынужденные вертикали
+                    dh = 1 if d > 0 else -1
+                    back = i - dh
+                    up = not cells[i + stride] and cells[back + stride]
+                    down = not cells[i - stride] and cells[back - stride]
+                    dirs = (dh,) + ((stride,) if up else ()) + ((-stride,) if down else ())
+
+            gi0 = g[i]
+            for dv in dirs:
+                if dv == 1 or dv == -1:
+                    j = jump_h(cells, i, dv, t, stride)
+                    cost = abs(j - i)
+                else:
+                    j = jump_v(cells, i, dv, t, stride)
+                    cost = abs(j - i) // stride
+                if j < 0 or closed[j] == gen:
+                    continue
+                gj = gi0 + cost
+                if seen[j] != gen or gj < g[j]:
+                    seen[j] = gen
+                    g[j] = gj
+                    parent[j] = i
+                    heapq.heappush(heap, key(j, gj))
+
+        self.expanded = expanded
+        return False
+
+
+# общий экземпляр для одиночных запросов (подсказки, тап-для-хода, ИИ)
+default_finder = PathFinder()
+
+
+def find_path(walls: Grid, start: Pos, goal: Pos, method: str = "astar") -> Optional[List[Pos]]:
+    return default_finder.find_path(walls, start, goal, method)
+
+
+def next_step(walls: Grid, start: Pos, goal: Pos, method: str = "astar") -> Optional[Pos]:
+    return default_finder.next_step(walls, start, goal, method)
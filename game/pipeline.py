@@ -0,0 +1,81 @@
+# game/pipeline.py
+"""
+Фоновая подготовка уровней.
+
+Пока игрок проходит уровень N, рабочий поток генерирует N+1 и запасной
+уровень 1 для рестарта. take() отдаёт готовую раскладку сразу, а если поток
+не успел — генерирует синхронно (как раньше). Каждая заготовка выдаётся
+не больше одного раза: take() забирает её под замком, поэтому повторный
+или одновременный рестарт не получит ту же раскладку, а опоздавший
+результат рабочего потока просто выбрасывается.
+
+Заготовки на диск не пишутся (seed у каждой свой и больше не встретится);
+в дисковый кэш попадает только начатый уровень — через background(),
+чтобы запись файла не шла в игровом потоке.
+"""
+import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Tuple
+
+from game.logic import LevelLayout, generate_level, level_config
+
+SeededLayout = Tuple[LevelLayout, int]  # (раскладка, seed, из которого она получена)
+
+
+def new_seed() -> int:
+    return random.getrandbits(32)
+
+
+def _generate(level: int) -> SeededLayout:
+    seed = new_seed()
+    return generate_level(level_config(level), seed=seed), seed
+
+
+class LevelPipeline:
+    def __init__(self, generate: Callable[[int], SeededLayout] = _generate):
+        self._generate = generate
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="levelgen")
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self.hits = 0    # отдано готовых раскладок
+        self.misses = 0  # пришлось генерировать синхронно
+
+    def prefetch(self, *levels: int) -> None:
+        """
+        Держать готовыми ровно эти уровни: недостающие ставятся в очередь,
+        заготовки других уровней (например, N+1 после рестарта) отбрасываются.
+        """
+        with self._lock:
+            stale = [lvl for lvl in self._pending if lvl not in levels]
+            for level in stale:
+                self._pending.pop(level).cancel()
+            for level in levels:
+                if level not in self._pending:
+                    self._pending[level] = self._executor.submit(self._generate, level)
+
+    def take(self, level: int) -> SeededLayout:
+        """Готовая раскладка уровня или синхронная генерация, если её ещё нет."""
+        with self._lock:
+            fut = self._pending.pop(level, None)
+        if fut is not None and fut.done() and not fut.cancelled() and fut.exception() is None:
+            self.hits += 1
+            return fut.result()
+        if fut is not None:
+            fut.cancel()  # ещё не начатую отменяем; начатая доработает впустую
+        self.misses += 1
+        return self._generate(level)
+
+    def background(self, fn: Callable, *args) -> None:
+        """Выполнить fn(*args) в рабочем потоке, после уже поставленных задач."""
+        self._executor.submit(fn, *args)
+
+    def clear(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for fut in pending.values():
+            fut.cancel()
+
+    def shutdown(self) -> None:
+        self.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,146 @@
+# game/profiler.py
+"""
+Профайлер по фазам кадра для оверлея F2 (game/debug_overlay.py).
+
+Фазы меряются вокруг вызовов в игре:
+    with profiler.phase("enemy_turn"):
+        ...
+Время фазы копится в текущем кадре; end_frame(dt) из тика приложения
+закрывает кадр и кладёт строку (время, длительность кадра, мс по фазам)
+в кольцевой буфер на HISTORY_S секунд. По буферу считаются p50/p95/p99
+кадра и среднее/максимум по фазам, а dump_csv выгружает последние N
+секунд — искать рывки на слабых телефонах без десктопного профайлера.
+
+Фазы хода (enemy_turn, bfs) попадают в кадр, в котором пришло касание.
+Фазы вложены как вызовы: animate включает redraw, если кадр был отрисован.
+
+Выключенный профайлер (по умолчанию) отдаёт из phase() общий пустой
+контекст — в игре без F2 остаётся только вызов метода.
+"""
+import csv
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Deque, Dict, List, Optional, Tuple
+
+PHASES: Tuple[str, ...] = ("animate", "redraw", "hud", "enemy_turn", "bfs", "save")
+HISTORY_S = 30.0
+HISTORY_FRAMES = 4096  # потолок строк: 30 с при ~120 тиках в секунду
+
+_NULL = nullcontext()
+
+Row = Tuple[float, ...]  # (t, frame_ms, *ms по PHASES)
+
+
+class _Timer:
+    __slots__ = ("prof", "slot", "t0")
+
+    def __init__(self, prof: "Profiler", slot: int):
+        self.prof = prof
+        self.slot = slot
+        self.t0 = 0.0
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc):
+        self.prof._cur[self.slot] += (time.perf_counter() - self.t0) * 1000.0
+        return False
+
+
+class Profiler:
+    def __init__(self, history_s: float = HISTORY_S):
+        self.enabled = False
+        self.history_s = history_s
+        self.rows: Deque[Row] = deque(maxlen=HISTORY_FRAMES)
+        self._cur: List[float] = [0.0] * len(PHASES)
+        self._timers: Dict[str, _Timer] = {
+            name: _Timer(self, i) for i, name in enumerate(PHASES)
+        }
+
+    def phase(self, name: str):
+        """Контекст замера фазы name (одна из PHASES)."""
+        if not self.enabled:
+            return _NULL
+        return self._timers[name]
+
+    def end_frame(self, dt: float) -> None:
+        """Закрыть кадр; dt — интервал тика в секундах."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.rows.append((now, dt * 1000.0, *self._cur))
+        self._cur = [0.0] * len(PHASES)
+        edge = now - self.history_s
+        rows = self.rows
+        while rows and rows[0][0] < edge:
+            rows.popleft()
+
+    def set_enabled(self, on: bool) -> None:
+        self.enabled = on
+        if not on:
+            self.rows.clear()
+            self._cur = [0.0] * len(PHASES)
+
+    # ---- статистика ----
+
+    def recent(self, seconds: Optional[float] = None) -> List[Row]:
+        if not self.rows:
+            return []
+        if seconds is None:
+            return list(self.rows)
+        edge = self.rows[-1][0] - seconds
+        return [r for r in self.rows if r[0] >= edge]
+
+    def frame_times(self, n: int) -> List[float]:
+        """Длительности последних n кадров, мс (для графика)."""
+        rows = self.rows
+        return [rows[i][1] for i in range(max(0, len(rows) - n), len(rows))]
+
+    def percentiles(self, qs: Tuple[float, ...] = (50, 95, 99),
+                    seconds: float = 5.0) -> Tuple[float, ...]:
+        times = sorted(r[1] for r in self.recent(seconds))
+        if not times:
+            return tuple(0.0 for _ in qs)
+        last = len(times) - 1
+        return tuple(times[min(last, int(round(q / 100 * last)))] for q in qs)
+
+    def phase_stats(self, seconds: float = 5.0) -> Dict[str, Tuple[int, float, float]]:
+        """{фаза: (кадров с фазой, среднее мс в таких кадрах, максимум мс)}."""
+        rows = self.recent(seconds)
+        out: Dict[str, Tuple[int, float, float]] = {}
+        for i, name in enumerate(PHASES, start=2):
+            vals = [r[i] for r in rows if r[i] > 0]
+            out[name] = (len(vals), sum(vals) / len(vals) if vals else 0.0,
+                         max(vals, default=0.0))
+        return out
+
+    # ---- выгрузка ----
+
+    def dump_csv(self, path: str, seconds: Optional[float] = None) -> int:
+        """Последние seconds секунд (все — None) в CSV; возвращает число строк."""
+        rows = self.recent(seconds)
+        t0 = rows[0][0] if rows else 0.0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(("t_s", "frame_ms", *(f"{p}_ms" for p in PHASES)))
+            for r in rows:
+                w.writerow((f"{r[0] - t0:.4f}", *(f"{v:.3f}" for v in r[1:])))
+        return len(rows)
+
+
+# общий профайлер игры
+profiler = Profiler()
+
+
+def count_instructions(group) -> int:
+    """Инструкций в canvas/группе, включая вложенные (Fbo, RenderContext)."""
+    n = 0
+    stack = [group]
+    while stack:
+        for child in getattr(stack.pop(), "children", ()):
+            n += 1
+            if getattr(child, "children", None):
+                stack.append(child)
+    return n
@@ -0,0 +1,457 @@
+# game/render.py
+"""
+Отрисовка игрового поля слоями, без canvas.clear() на каждом кадре.
+
+Холст виджета собирается один раз из групп инструкций:
+  запечённое — Fbo размером с виджет, выводится одним Rectangle с текстурой:
+      фон     — градиент и виньетка; пересобирается при смене размера/биома;
+      статика — подсветка под полем, клетки и сетка (Mesh, см. game/tilemesh.py);
+                пересобирается при смене видимой области камеры, биома или
+                карты, снесённая бомбой стена перекрашивается на месте;
+      Fbo перерисовывается только после изменения фона или статики;
+  [Translate тряски]
+  пульсации  — сокровища, аптечки, портал (под фигурами), текстуры из game/shapes.py;
+  фигуры     — следы врагов, враги, игрок;
+  эффекты    — взрывы и вспышки ударов (модель — game/effects.py).
+
+Без PNG-спрайтов охотник и скелет — тоже текстуры из game/shapes.py,
+запечённые под размер клетки: одна текстура на фигуру вместо ~20
+инструкций на каждый объект.
+
+Фигуры и эффекты лежат в пулах: инструкции создаются, когда объектов
+становится больше, чем когда-либо было, а на кадре у готовых инструкций
+меняются только pos/size/rgba. Лишние снимаются с холста, но остаются
+в пуле. Пулы эффектов заранее заполнены на всю ёмкость EffectPool, так что
+серия взрывов не создаёт инструкций посреди анимации. Пулы пересоздаются
+только при смене размера клетки или текстур.
+
+Тряска камеры сдвигает прямоугольник с текстурой Fbo и Translate над
+динамическими слоями; под текстурой — заливка цветом фона, чтобы при
+сдвиге не открывался край.
+"""
+import math
+import random
+from typing import Any, Callable, List, Optional, Tuple
+
+from kivy.graphics import (
+    ClearBuffers, ClearColor, Color, Ellipse, Fbo, InstructionGroup, Line, PopMatrix,
+    PushMatrix, Rectangle, Translate
+)
+
+from game.camera import View
+from game.effects import CAPACITY as FX_CAPACITY, Effects
+from game.grid import Grid, Pos
+from game.shapes import ShapeCache
+from game.theme import (
+    COL_BG, COL_FLOOR, COL_GOAL, COL_GRID, COL_MEDKIT, COL_TREASURE, COL_WALL
+)
+from game.tilemesh import TileMesh
+
+MAX_CELL_EDITS = 16  # больше правок стен разом — проще пересобрать статику
+
+
+# ---- пулы ----
+
+class Pool:
+    """
+    Одинаковые наборы инструкций в своей группе. build(group) добавляет
+    инструкции одного элемента и возвращает ручки для их изменения.
+    """
+
+    def __init__(self, layer: InstructionGroup, build: Callable[[InstructionGroup], Any],
+                 head: Tuple = (), reserve: int = 0):
+        self.group = InstructionGroup()
+        for instr in head:  # общие инструкции пула (например, один Color на всех)
+            self.group.add(instr)
+        layer.add(self.group)
+        self.build = build
+        self.items: List[Tuple[InstructionGroup, Any]] = []
+        self.handles: List[Any] = []
+        self.shown = 0
+        self._grow(reserve)
+
+    def _grow(self, n: int) -> None:
+        while len(self.items) < n:
+            g = InstructionGroup()
+            parts = self.build(g)
+            self.items.append((g, parts))
+            self.handles.append(parts)
+
+    def show(self, n: int) -> List[Any]:
+        """Показать n элементов; возвращает ручки всех элементов пула (первые n — видимые)."""
+        self._grow(n)
+        for g, _ in self.items[self.shown:n]:
+            self.group.add(g)
+        for g, _ in self.items[n:self.shown]:
+            self.group.remove(g)
+        self.shown = n
+        return self.handles
+
+
+def _unit(build_body: Callable[[InstructionGroup], None], aura, tile: float):
+    """Фигура в клетке: аура + тело; двигается двумя Translate (клетка и покачивание)."""
+    def build(g: InstructionGroup):
+        g.add(PushMatrix())
+        cell = Translate(0, 0)
+        g.add(cell)
+        g.add(Color(*aura))
+        g.add(Ellipse(pos=(tile * 0.05, tile * 0.05), size=(tile * 0.9, tile * 0.9)))
+        bob = Translate(0, 0)
+        g.add(bob)
+        build_body(g)
+        g.add(PopMatrix())
+        return cell, bob
+    return build
+
+
+def _sprite_body(tex, inset: float, size: float) -> Callable[[InstructionGroup], None]:
+    def build(g: InstructionGroup) -> None:
+        g.add(Color(1, 1, 1, 1))
+        g.add(Rectangle(texture=tex, pos=(inset, inset), size=(size, size)))
+    return build
+
+
+def _quad(tex) -> Callable[[InstructionGroup], Any]:
+    """Один прямоугольник с текстурой; на кадре меняются его pos/size."""
+    def build(g: InstructionGroup):
+        g.add(Color(1, 1, 1, 1))
+        r = Rectangle(texture=tex)
+        g.add(r)
+        return r
+    return build
+
+
+# ---- рендерер ----
+
+class LayeredRenderer:
+    def __init__(self, canvas):
+        canvas.clear()
+        self.background = InstructionGroup()
+        self.static = InstructionGroup()
+        self.pulses = InstructionGroup()
+        self.units = InstructionGroup()
+        self.fx = InstructionGroup()
+        self.shake = Translate(0, 0)
+
+        # фон и статика рисуются в Fbo; координаты в них — экранные, как у
+        # остальных слоёв, поэтому внутри Fbo сдвиг на -pos виджета
+        self.fbo = Fbo(size=(1, 1))
+        self.fbo.add(ClearColor(0, 0, 0, 0))
+        self.fbo.add(ClearBuffers())
+        self.fbo.add(PushMatrix())
+        self._fbo_origin = Translate(0, 0)
+        self.fbo.add(self._fbo_origin)
+        self.fbo.add(self.background)
+        self.fbo.add(self.static)
+        self.fbo.add(PopMatrix())
+
+        self._under_color = Color(*COL_BG)
+        self._under = Rectangle()
+        self._baked = Rectangle(texture=self.fbo.texture)
+        canvas.add(self.fbo)
+        canvas.add(self._under_color)
+        canvas.add(self._under)
+        canvas.add(Color(1, 1, 1, 1))
+        canvas.add(self._baked)
+        canvas.add(PushMatrix())
+        canvas.add(self.shake)
+        for layer in (self.pulses, self.units, self.fx):
+            canvas.add(layer)
+        canvas.add(PopMatrix())
+
+        self._bg_key: Optional[tuple] = None
+        self._static_key: Optional[tuple] = None
+        self._static_walls: Optional[Grid] = None  # держим ссылку: ключ сравнивает по is
+        self._static_version = 0
+        self.tiles = TileMesh()
+        self.shapes = ShapeCache()  # текстуры фигур, если нет спрайтов
+        self._pool_key: Optional[tuple] = None
+        self.rebuilds = 0  # пересборок статики (для отладки)
+        self.bakes = 0     # перерисовок Fbo
+
+    def invalidate(self) -> None:
+        """Пересобрать всё на следующем кадре (например, после потери GL-контекста)."""
+        self._bg_key = self._static_key = self._pool_key = None
+        self._static_walls = None
+        self.shapes.clear()
+
+    def render(self, widget, app) -> None:
+        st = widget.state
+        if not st.walls or not st.cfg:
+            return
+
+        biome = getattr(app, "biome", None)
+        bg_col = tuple(getattr(biome, "bg", COL_BG))
+        floor_col = tuple(getattr(biome, "floor", COL_FLOOR))
+        wall_col = tuple(getattr(biome, "wall", COL_WALL))
+        goal_col = tuple(getattr(biome, "goal", COL_GOAL))
+
+        view = widget.camera.layout(widget.x, widget.y, widget.width, widget.height,
+                                    st.cfg.w, st.cfg.h, st.player)
+        widget.view = view
+        tile = view.tile
+
+        changed = self._draw_background(widget, bg_col)
+        changed |= self._draw_static(view, st.walls, st.cfg.w, st.cfg.h, floor_col, wall_col)
+        if changed:
+            self.fbo.ask_update()
+            self.bakes += 1
+
+        player_tex = getattr(app, "player_tex", None)
+        skeleton_tex = getattr(app, "skeleton_tex", None)
+        frames: List = getattr(app, "explosion_frames", [])
+        pool_key = (tile, id(player_tex), id(skeleton_tex), bool(frames), goal_col)
+        if pool_key != self._pool_key:
+            self._build_pools(tile, player_tex, skeleton_tex, frames, goal_col)
+            self._pool_key = pool_key
+
+        # тряска камеры — сдвиг всего поля
+        sx = sy = 0.0
+        if widget.shake_remaining > 0:
+            t = widget.shake_remaining / max(widget.shake_max, 0.001)
+            amp = widget.shake_strength * t
+            sx = (random.random() * 2 - 1) * amp * tile * 0.25
+            sy = (random.random() * 2 - 1) * amp * tile * 0.25
+        self.shake.xy = (sx, sy)
+        self._baked.pos = (widget.x + sx, widget.y + sy)
+
+        now = widget.anim_time
+        visible = view.contains
+        self._draw_pulses(view, now, [p for p in st.treasures if visible(p)],
+                          [p for p in st.medkits if visible(p)],
+                          st.goal if st.walls.in_bounds(*st.goal) and visible(st.goal) else None)
+        self._draw_units(view, now, [p for p in widget.last_enemy_positions if visible(p)],
+                         [p for p in st.enemies if visible(p)], st.player)
+        self._draw_fx(view, frames, widget.effects)
+
+    # ---- статические слои ----
+
+    def _draw_background(self, widget, bg_col) -> bool:
+        key = (widget.x, widget.y, widget.width, widget.height, bg_col)
+        if key == self._bg_key:
+            return False
+        self._bg_key = key
+        x, y, width, height = key[:4]
+
+        size = (max(1, int(width)), max(1, int(height)))
+        if tuple(self.fbo.size) != size:
+            self.fbo.size = size
+            self._baked.texture = self.fbo.texture  # новая текстура после смены размера
+        self._baked.size = size
+        self._fbo_origin.xy = (-x, -y)
+        self._under_color.rgba = (bg_col[0], bg_col[1], bg_col[2], 1)
+        self._under.pos = (x, y)
+        self._under.size = (width, height)
+
+        g = self.background
+        g.clear()
+
+        # базовая заливка
+        g.add(Color(*bg_col))
+        g.add(Rectangle(pos=(x, y), size=(width, height)))
+
+        # вертикальный "сияющий" градиент (светлее в центре)
+        steps = 7
+        for i in range(steps):
+            t = i / max(steps - 1, 1)
+            k = 0.7 + 0.4 * (1.0 - abs(2 * t - 1.0))
+            g.add(Color(bg_col[0] * k, bg_col[1] * k, bg_col[2] * k, 0.45))
+            g.add(Rectangle(pos=(x, y + height * t), size=(width, height / steps)))
+
+        # мягкая виньетка по краям
+        g.add(Color(0, 0, 0, 0.30))
+        g.add(Rectangle(pos=(x, y), size=(width * 0.05, height)))
+        g.add(Rectangle(pos=(x + width * 0.95, y), size=(width * 0.05, height)))
+        g.add(Rectangle(pos=(x, y), size=(width, height * 0.07)))
+        g.add(Rectangle(pos=(x, y + height * 0.93), size=(width, height * 0.07)))
+        return True
+
+    def _draw_static(self, view: View, walls: Grid, w: int, h: int, floor_col, wall_col) -> bool:
+        key = (view.tile, view.ox, view.oy, view.x0, view.y0, view.x1, view.y1,
+               floor_col, wall_col)
+        if key == self._static_key and walls is self._static_walls:
+            if walls.version == self._static_version:
+                return False
+            # бомба: перекрасить снесённые стены в готовых вершинах
+            edits = walls.edits_since(self._static_version)
+            if edits is not None and len(edits) <= MAX_CELL_EDITS:
+                for _v, i, _old, _new in edits:
+                    x, y = walls.pos(i)
+                    self.tiles.set_cell(walls, x, y)
+                self._static_version = walls.version
+                return True
+        self._static_key = key
+        self._static_walls = walls
+        self._static_version = walls.version
+        self.rebuilds += 1
+
+        g = self.static
+        g.clear()
+        tile, ox, oy = view.tile, view.ox, view.oy
+
+        # подсветка под полем
+        g.add(Color(0.10, 0.12, 0.22, 1))
+        g.add(Rectangle(pos=(ox - 8, oy - 8), size=(tile * w + 16, tile * h + 16)))
+
+        # клетки и сетка (только видимые) — несколько Mesh
+        self.tiles.build(view, walls, h, floor_col, wall_col, COL_GRID)
+        g.add(self.tiles.context)
+        return True
+
+    # ---- пулы ----
+
+    def _build_pools(self, tile: int, player_tex, skeleton_tex, frames: List, goal_col) -> None:
+        for layer in (self.pulses, self.units, self.fx):
+            layer.clear()
+
+        shapes = self.shapes
+        self.treasures = Pool(self.pulses, _quad(shapes.get("pulse", tile, COL_TREASURE)))
+        self.medkits = Pool(self.pulses, _quad(shapes.get("pulse", tile, COL_MEDKIT)))
+
+        pulse_tex = shapes.get("pulse", tile, goal_col)
+        disc_tex = shapes.get("disc", tile, goal_col)
+
+        def build_goal(g: InstructionGroup):
+            halo = _quad(pulse_tex)(g)
+            g.add(Color(1, 1, 1, 0.75))
+            orbits = [Rectangle(texture=disc_tex, size=(tile * 0.16, tile * 0.16)) for _ in range(3)]
+            for o in orbits:
+                g.add(o)
+            return halo, orbits
+        self.goal = Pool(self.pulses, build_goal)
+
+        def build_mark(g: InstructionGroup):
+            e = Ellipse(size=(tile * 0.76, tile * 0.76))
+            g.add(e)
+            return e
+        # прошлые позиции врагов — подсветка хода (под самими врагами)
+        self.marks = Pool(self.units, build_mark, head=(Color(1.0, 0.4, 0.4, 0.25),))
+
+        # спрайт занимает 0.9 клетки; запечённая фигура нарисована на всю клетку
+        enemy_body = (_sprite_body(skeleton_tex, tile * 0.05, tile * 0.9) if skeleton_tex
+                      else _sprite_body(shapes.get("skeleton", tile), 0, tile))
+        player_body = (_sprite_body(player_tex, tile * 0.05, tile * 0.9) if player_tex
+                       else _sprite_body(shapes.get("hunter", tile), 0, tile))
+        self.enemies = Pool(self.units, _unit(enemy_body, (1.0, 0.3, 0.3, 0.35), tile))
+        self.player = Pool(self.units, _unit(player_body, (0.3, 0.6, 1.0, 0.4), tile))
+
+        if frames:
+            def build_explosion(g: InstructionGroup):
+                c = Color(1, 1, 1, 1)
+                r = Rectangle(texture=frames[0], size=(tile * 1.4, tile * 1.4))
+                g.add(c)
+                g.add(r)
+                return c, r
+        else:
+            def build_explosion(g: InstructionGroup):
+                c1, e1 = Color(1.0, 0.5, 0.2, 1), Ellipse()
+                c2, e2 = Color(1.0, 0.9, 0.6, 1), Ellipse()
+                for instr in (c1, e1, c2, e2):
+                    g.add(instr)
+                return c1, e1, c2, e2
+        self.explosions = Pool(self.fx, build_explosion, reserve=FX_CAPACITY)
+
+        def build_flash(g: InstructionGroup):
+            c1, ring = Color(1.0, 0.2, 0.3, 1), Line(width=2.5)
+            c2, blob = Color(1.0, 0.4, 0.4, 1), Ellipse()
+            for instr in (c1, ring, c2, blob):
+                g.add(instr)
+            return c1, ring, c2, blob
+        self.flashes = Pool(self.fx, build_flash, reserve=FX_CAPACITY)
+
+    # ---- покадровые слои ----
+
+    def _draw_pulses(self, view: View, now: float, treasures: List[Pos], medkits: List[Pos],
+                     goal: Optional[Pos]) -> None:
+        tile = view.tile
+
+        def place(quad, p: Pos, base_inset: float, speed: float) -> None:
+            # пульсация — размер прямоугольника: точка d, ореол 1.5 d вокруг центра клетки
+            x, y = p
+            inset = base_inset + 0.03 * math.sin(now * speed + (x + y) * 0.4)
+            cx0, cy0 = view.cell(p)
+            half = tile * (1.0 - 2 * inset) * 0.75
+            quad.pos = (cx0 + tile * 0.5 - half, cy0 + tile * 0.5 - half)
+            quad.size = (2 * half, 2 * half)
+
+        for parts, p in zip(self.treasures.show(len(treasures)), treasures):
+            place(parts, p, 0.26, 3.0)
+        for parts, p in zip(self.medkits.show(len(medkits)), medkits):
+            place(parts, p, 0.28, 2.0)
+
+        goals = [goal] if goal is not None else []
+        for (halo, orbits), p in zip(self.goal.show(len(goals)), goals):
+            place(halo, p, 0.24, 2.5)
+            cx0, cy0 = view.cell(p)
+            cx, cy = cx0 + tile * 0.5, cy0 + tile * 0.5
+            orbit_r = tile * 0.35
+            for i, orbit in enumerate(orbits):
+                ang = now * 2.0 + i * (2 * math.pi / 3)
+                orbit.pos = (cx + orbit_r * math.cos(ang) - tile * 0.08,
+                             cy + orbit_r * math.sin(ang) - tile * 0.08)
+
+    def _draw_units(self, view: View, now: float, marks: List[Pos], enemies: List[Pos],
+                    player: Pos) -> None:
+        tile = view.tile
+        for e, p in zip(self.marks.show(len(marks)), marks):
+            cx0, cy0 = view.cell(p)
+            e.pos = (cx0 + tile * 0.12, cy0 + tile * 0.12)
+
+        for (cell, bob), (x, y) in zip(self.enemies.show(len(enemies)), enemies):
+            cell.xy = view.cell((x, y))
+            bob.y = math.sin(now * 4.5 + (x + y) * 0.7) * tile * 0.05
+
+        cell, bob = self.player.show(1)[0]
+        px, py = player
+        cell.xy = view.cell(player)
+        bob.y = math.sin(now * 5.0 + (px + py) * 0.5) * tile * 0.06
+
+    def _draw_fx(self, view: View, frames: List, effects: Effects) -> None:
+        """Свойства эффектов — функции progress: альфа, радиус, кадр атласа."""
+        tile = view.tile
+        visible = view.contains
+        last_frame = len(frames) - 1
+
+        parts = self.explosions.handles
+        n = 0
+        for fx in effects.explosions.visible():
+            if not visible(fx.pos):
+                continue
+            progress = fx.progress
+            cx0, cy0 = view.cell(fx.pos)
+            cx, cy = cx0 + tile * 0.5, cy0 + tile * 0.5
+            alpha = 1.0 - progress
+            if frames:
+                c, r = parts[n]
+                r.texture = frames[int(progress * last_frame)]
+                sz = tile * 1.4
+                r.pos = (cx - sz / 2, cy - sz / 2)
+                c.a = alpha
+            else:
+                c1, e1, c2, e2 = parts[n]
+                radius = tile * (0.2 + 0.5 * progress)
+                inner = radius * 0.6
+                c1.a = c2.a = alpha
+                e1.pos, e1.size = (cx - radius, cy - radius), (2 * radius, 2 * radius)
+                e2.pos, e2.size = (cx - inner, cy - inner), (2 * inner, 2 * inner)
+            n += 1
+        self.explosions.show(n)
+
+        parts = self.flashes.handles
+        n = 0
+        for fx in effects.flashes.visible():
+            if not visible(fx.pos):
+                continue
+            progress = fx.progress
+            radius = tile * (0.3 + 0.4 * progress)
+            alpha = 1.0 - progress
+            cx0, cy0 = view.cell(fx.pos)
+            cx, cy = cx0 + tile * 0.5, cy0 + tile * 0.5
+            c1, ring, c2, blob = parts[n]
+            c1.a = alpha
+            c2.a = alpha * 0.4
+            ring.circle = (cx, cy, radius)
+            blob.pos = (cx - radius * 0.6, cy - radius * 0.6)
+            blob.size = (radius * 1.2, radius * 1.2)
+            n += 1
+        self.flashes.show(n)
@@ -0,0 +1,158 @@
+# game/savestore.py
+"""
+Сохранения игры: save.json с разделами progress / settings / meta.
+
+JsonStore переписывал весь файл на каждый put, а put звали на каждый
+кристалл, каждое движение ползунка громкости и каждый рестарт. Здесь put
+только меняет раздел в памяти и помечает файл грязным; фоновый поток
+ждёт SAVE_DELAY секунд, собирая все изменения, и пишет файл один раз —
+во временный файл и затем os.replace, так что при падении на диске
+остаётся либо старый, либо новый save.json целиком.
+
+flush() пишет сразу в вызывающем потоке (on_pause, on_stop): на Android
+приложение после паузы могут убить без on_stop.
+
+Формат файла тот же, что у JsonStore ({раздел: {ключ: значение}}), —
+старые сохранения читаются как есть. Двоичные данные (снимок уровня,
+game/snapshot.py) лежат рядом отдельными файлами: put_file копит их так
+же и пишет в той же записи.
+"""
+import copy
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from game.trace import span
+
+SAVE_DELAY = 1.0  # секунд собираем изменения перед записью
+
+
+class SaveStore:
+    def __init__(self, path: str, delay: float = SAVE_DELAY):
+        self.path = path
+        self.delay = delay
+        self.directory = os.path.dirname(path)
+        self._data: Dict[str, Dict[str, Any]] = self._read()
+        self._dirty = False                          # разделы JSON
+        self._files: Dict[str, Optional[bytes]] = {}  # имя -> данные (None — удалить)
+        self._closed = False
+        self._lock = threading.Lock()       # разделы и флаг
+        self._wake = threading.Condition(self._lock)
+        self._io = threading.Lock()         # одна запись файла за раз
+        self._thread: Optional[threading.Thread] = None
+        self.puts = 0    # изменений разделов
+        self.writes = 0  # записей файла
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    # ---- как у JsonStore ----
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def get(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self._data[key])
+
+    def put(self, key: str, **values: Any) -> None:
+        """Обновить раздел в памяти; на диск — в фоне, не раньше чем через delay."""
+        with self._lock:
+            if self._data.get(key) == values:
+                return
+            self._data[key] = copy.deepcopy(values)
+            self._dirty = True
+            self._changed()
+
+    # ---- двоичные файлы рядом с save.json ----
+
+    def put_file(self, name: str, data: Optional[bytes]) -> None:
+        """Файл name в каталоге сохранений: data — записать, None — удалить."""
+        with self._lock:
+            self._files[name] = data
+            self._changed()
+
+    def read_file(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            if name in self._files:  # ещё не записан
+                return self._files[name]
+        try:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _changed(self) -> None:
+        """Под self._lock: разбудить фоновую запись."""
+        self.puts += 1
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="savestore", daemon=True)
+            self._thread.start()
+        self._wake.notify()
+
+    # ---- запись ----
+
+    def flush(self) -> bool:
+        """Записать изменения сейчас; False — запись не удалась (останутся грязными)."""
+        with self._io:
+            with self._lock:
+                if not self._dirty and not self._files:
+                    return True
+                payload = json.dumps(self._data, ensure_ascii=False) if self._dirty else None
+                files, self._files = self._files, {}
+                self._dirty = False
+            try:
+                with span("SaveStore.write", cat="io"):
+                    for name, data in files.items():
+                        path = os.path.join(self.directory, name)
+                        if data is None:
+                            if os.path.exists(path):
+                                os.remove(path)
+                        else:
+                            self._write_atomic(path, data)
+                    if payload is not None:
+                        self._write_atomic(self.path, payload.encode("utf-8"))
+            except OSError as e:
+                print(f"[save] write failed: {self.path} ({e})")
+                with self._lock:
+                    self._dirty = self._dirty or payload is not None
+                    for name, data in files.items():
+                        self._files.setdefault(name, data)  # новее не затираем
+                return False
+            self.writes += 1
+            return True
+
+    def close(self) -> None:
+        """Последняя синхронная запись; фоновый поток завершается."""
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._wake.notify()
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not (self._dirty or self._files) and not self._closed:
+                    self._wake.wait()
+                if self._closed:
+                    return
+            time.sleep(self.delay)  # пока спим, put-ы копятся в одну запись
+            if not self.flush():
+                time.sleep(self.delay * 4)  # диск недоступен — не долбим каждую секунду
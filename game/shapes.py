@@ -0,0 +1,185 @@
+# game/shapes.py
+"""
+Процедурные фигуры (охотник, скелет, пульсирующая точка), запечённые в
+текстуры под текущий размер клетки.
+
+Фигура из ~20 Color/Rectangle/Ellipse/Line рисуется один раз в Fbo размером
+с клетку, дальше каждый объект — один Rectangle с этой текстурой, а
+покачивание и пульсация — сдвиг и размер прямоугольника. Кэш держит
+текстуры только для одного размера клетки: при смене (зум, поворот
+экрана) всё рисуется заново при первом запросе.
+
+Полупрозрачная точка рисуется в Fbo, очищенный её же цветом с нулевой
+альфой: тогда в текстуре прямой (не домноженный) цвет и края при
+масштабировании не темнеют.
+"""
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from kivy.graphics import ClearBuffers, ClearColor, Color, Ellipse, Fbo, InstructionGroup, Line, Rectangle
+
+from game.theme import COL_ENEMY
+
+# ---- фигуры (координаты от угла клетки, без покачивания) ----
+
+def hunter_shape(g: InstructionGroup, tile: float) -> None:
+    cx = tile * 0.5
+    cy = tile * 0.45
+
+    body_w = tile * 0.5
+    body_h = tile * 0.4
+    head_r = tile * 0.18
+    leg_w = tile * 0.16
+    leg_h = tile * 0.22
+    leg_gap = tile * 0.04
+
+    g.add(Color(0.18, 0.40, 0.90, 1))
+    g.add(Rectangle(pos=(cx - leg_gap / 2 - leg_w, cy - body_h * 0.8 - leg_h),
+                    size=(leg_w, leg_h)))
+    g.add(Rectangle(pos=(cx + leg_gap / 2, cy - body_h * 0.8 - leg_h),
+                    size=(leg_w, leg_h)))
+
+    g.add(Color(0.05, 0.05, 0.08, 1))
+    boot_h = leg_h * 0.35
+    g.add(Rectangle(pos=(cx - leg_gap / 2 - leg_w, cy - body_h * 0.8 - leg_h),
+                    size=(leg_w, boot_h)))
+    g.add(Rectangle(pos=(cx + leg_gap / 2, cy - body_h * 0.8 - leg_h),
+                    size=(leg_w, boot_h)))
+
+    g.add(Color(0.55, 0.35, 0.18, 1))
+    g.add(Rectangle(pos=(cx - body_w / 2, cy - body_h / 2), size=(body_w, body_h)))
+
+    g.add(Color(0.10, 0.10, 0.12, 1))
+    belt_h = body_h * 0.18
+    g.add(Rectangle(pos=(cx - body_w / 2, cy - belt_h / 2), size=(body_w, belt_h)))
+
+    g.add(Color(0.9, 0.8, 0.3, 1))
+    buckle_w = belt_h * 0.7
+    g.add(Rectangle(pos=(cx - buckle_w / 2, cy - belt_h / 2 + belt_h * 0.1),
+                    size=(buckle_w, belt_h * 0.8)))
+
+    g.add(Color(0.96, 0.84, 0.65, 1))
+    g.add(Ellipse(pos=(cx - head_r, cy + body_h * 0.35), size=(2 * head_r, 2 * head_r)))
+
+    g.add(Color(0.30, 0.18, 0.08, 1))
+    brim_w = head_r * 3.0
+    brim_h = head_r * 0.55
+    g.add(Rectangle(pos=(cx - brim_w / 2, cy + body_h * 0.35 + head_r * 0.8),
+                    size=(brim_w, brim_h)))
+
+    g.add(Color(0.25, 0.15, 0.07, 1))
+    hat_w = head_r * 1.7
+    hat_h = head_r * 1.6
+    g.add(Rectangle(pos=(cx - hat_w / 2, cy + body_h * 0.35 + head_r * 0.9),
+                    size=(hat_w, hat_h)))
+
+
+def skeleton_shape(g: InstructionGroup, tile: float) -> None:
+    cx = tile * 0.5
+    cy = tile * 0.50
+
+    skull_r = tile * 0.20
+    jaw_h = tile * 0.10
+    body_h = tile * 0.35
+    body_w = tile * 0.30
+    leg_h = tile * 0.22
+    leg_w = tile * 0.10
+    leg_gap = tile * 0.05
+
+    g.add(Color(*COL_ENEMY))
+    g.add(Rectangle(pos=(cx - leg_gap / 2 - leg_w, cy - body_h * 0.7 - leg_h),
+                    size=(leg_w, leg_h)))
+    g.add(Rectangle(pos=(cx + leg_gap / 2, cy - body_h * 0.7 - leg_h),
+                    size=(leg_w, leg_h)))
+
+    g.add(Color(0.85, 0.85, 0.9, 1))
+    foot_h = leg_h * 0.35
+    g.add(Rectangle(pos=(cx - leg_gap / 2 - leg_w, cy - body_h * 0.7 - leg_h),
+                    size=(leg_w, foot_h)))
+    g.add(Rectangle(pos=(cx + leg_gap / 2, cy - body_h * 0.7 - leg_h),
+                    size=(leg_w, foot_h)))
+
+    g.add(Color(*COL_ENEMY))
+    spine_w = tile * 0.09
+    g.add(Rectangle(pos=(cx - spine_w / 2, cy - body_h / 2), size=(spine_w, body_h)))
+
+    rib_count = 3
+    rib_len = body_w
+    for i in range(rib_count):
+        t = (i + 1) / (rib_count + 1)
+        ry = cy - body_h / 2 + body_h * t
+        g.add(Line(points=[cx - rib_len / 2, ry, cx + rib_len / 2, ry], width=1.3))
+
+    g.add(Ellipse(pos=(cx - skull_r, cy + body_h * 0.4), size=(2 * skull_r, 2 * skull_r)))
+
+    jaw_w = skull_r * 1.5
+    g.add(Rectangle(pos=(cx - jaw_w / 2, cy + body_h * 0.4 - jaw_h * 0.2), size=(jaw_w, jaw_h)))
+
+    eye_r = skull_r * 0.35
+    eye_dx = skull_r * 0.55
+    g.add(Color(0.08, 0.08, 0.12, 1))
+    g.add(Ellipse(pos=(cx - eye_dx - eye_r, cy + body_h * 0.4 + skull_r * 0.2),
+                  size=(2 * eye_r, 2 * eye_r)))
+    g.add(Ellipse(pos=(cx + eye_dx - eye_r, cy + body_h * 0.4 + skull_r * 0.2),
+                  size=(2 * eye_r, 2 * eye_r)))
+
+    nose_w = skull_r * 0.35
+    nose_h = skull_r * 0.25
+    g.add(Rectangle(pos=(cx - nose_w / 2, cy + body_h * 0.4 + skull_r * 0.05),
+                    size=(nose_w, nose_h)))
+
+
+def pulse_shape(g: InstructionGroup, size: float, color: Sequence[float]) -> None:
+    """Ореол (альфа 0.35) и точка в 2/3 его диаметра, по центру квадрата size."""
+    g.add(Color(color[0], color[1], color[2], 0.35))
+    g.add(Ellipse(pos=(0, 0), size=(size, size)))
+    d = size / 1.5
+    g.add(Color(color[0], color[1], color[2], 1))
+    g.add(Ellipse(pos=((size - d) / 2, (size - d) / 2), size=(d, d)))
+
+
+def disc_shape(g: InstructionGroup, size: float, color: Sequence[float]) -> None:
+    g.add(Color(color[0], color[1], color[2], 1))
+    g.add(Ellipse(pos=(0, 0), size=(size, size)))
+
+
+# ---- кэш текстур ----
+
+ShapeKey = Tuple[str, Optional[Tuple[float, ...]]]
+
+_BUILDERS: Dict[str, Callable] = {
+    "hunter": lambda g, size, _color: hunter_shape(g, size),
+    "skeleton": lambda g, size, _color: skeleton_shape(g, size),
+    "pulse": pulse_shape,
+    "disc": disc_shape,
+}
+
+
+class ShapeCache:
+    def __init__(self):
+        self.tile = 0
+        self._fbos: Dict[ShapeKey, Fbo] = {}
+        self.renders = 0  # сколько фигур нарисовано в текстуры (для отладки)
+
+    def get(self, kind: str, tile: int, color: Optional[Sequence[float]] = None):
+        """Текстура фигуры kind для клетки tile (квадрат tile x tile)."""
+        if tile != self.tile:
+            self._fbos.clear()
+            self.tile = tile
+        key: ShapeKey = (kind, tuple(color) if color is not None else None)
+        fbo = self._fbos.get(key)
+        if fbo is None:
+            size = max(1, int(tile))
+            fbo = Fbo(size=(size, size))
+            # прозрачный фон цвета фигуры — см. docstring модуля
+            c = color if color is not None else (0, 0, 0)
+            fbo.add(ClearColor(c[0], c[1], c[2], 0))
+            fbo.add(ClearBuffers())
+            _BUILDERS[kind](fbo, size, color)
+            fbo.draw()
+            self._fbos[key] = fbo
+            self.renders += 1
+        return fbo.texture
+
+    def clear(self) -> None:
+        self._fbos.clear()
+        self.tile = 0
@@ -0,0 +1,159 @@
+# game/snapshot.py
+"""
+Снимок незаконченного уровня кампании: после рестарта процесса (или когда
+Android убил приложение в фоне) игра продолжается с той же клетки той же
+карты, а не с новой генерации уровня.
+
+Запись — заголовок и секции (тег, длина, данные):
+  STATE — уровень, очки, жизни, бомбы, seed, LevelConfig, старт, портал, игрок;
+  LEVEL — стены по биту на клетку (Grid.pack_bits), сокровища, аптечки, враги;
+  JOURNAL — журнал отмены/повтора (game/journal.py), если он не пуст.
+Позиции — индексы y * w + x, как в game/levelcache.py. Читатель пропускает
+незнакомые теги, поэтому новые секции добавляются без смены FORMAT_VERSION;
+её меняют, только если старые секции перестают читаться как раньше.
+
+Секция UNDO (полная копия уровня для единственной отмены) больше не
+пишется; в старых снимках она просто пропускается.
+
+Снимок 32x18 — около 200 байт плюс ~80 байт на ход в журнале; упаковка
+и разбор — десятки микросекунд.
+"""
+import struct
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from game.grid import Grid, Pos
+from game.journal import UndoJournal
+from game.logic import LevelConfig
+from game.state import GameState
+
+MAGIC = b"SNP"
+FORMAT_VERSION = 1
+
+TAG_STATE = 1
+TAG_LEVEL = 2
+TAG_UNDO = 3     # устарела: не пишется и не читается
+TAG_JOURNAL = 4
+
+# magic, формат, число секций
+_HEADER = struct.Struct("<3sBH")
+_SECTION = struct.Struct("<BI")
+# level, score, lives, max_lives, bombs, seed, w, h, wall_prob * 1e4,
+# treasures, enemies, medkits, enemy_steps, start, goal, player, резерв (был undo_available)
+_STATE = struct.Struct("<HiHHHQHHHHHHHIIIB")
+
+
+@dataclass
+class Snapshot:
+    state: GameState
+    journal: UndoJournal
+
+    def apply(self, st: GameState) -> None:
+        """Перенести снимок в существующий GameState (на него ссылается виджет)."""
+        src = self.state
+        for name in ("level", "score", "lives", "max_lives", "bombs", "cfg", "walls",
+                     "start", "goal", "player", "treasures", "medkits", "enemies", "seed"):
+            setattr(st, name, getattr(src, name))
+        st.world = None
+        st.message = None
+
+
+# ---- упаковка ----
+
+def _cells(ps: Iterable[Pos], w: int) -> bytes:
+    ids = [y * w + x for x, y in ps]
+    return struct.pack(f"<H{len(ids)}I", len(ids), *ids)
+
+
+def _section(tag: int, payload: bytes) -> bytes:
+    return _SECTION.pack(tag, len(payload)) + payload
+
+
+def _level_body(walls: Grid, treasures, medkits, enemies) -> bytes:
+    w = walls.w
+    return b"".join((walls.pack_bits(), _cells(sorted(treasures), w),
+                     _cells(sorted(medkits), w), _cells(enemies, w)))
+
+
+def pack_snapshot(st: GameState, journal: Optional[UndoJournal] = None) -> Optional[bytes]:
+    """
+    None — снимать нечего: бесконечный режим или жизни кончились (или seed
+    не помещается в 64 бита без знака — такой снимок не сверить с прогрессом).
+    """
+    if st.world is not None or st.walls is None or st.lives <= 0:
+        return None
+    if not 0 <= st.seed <= 0xFFFFFFFFFFFFFFFF:
+        return None
+    cfg, w = st.cfg, st.cfg.w
+    sections = [
+        _section(TAG_STATE, _STATE.pack(
+            st.level, st.score, st.lives, st.max_lives, st.bombs,
+            st.seed, cfg.w, cfg.h, round(cfg.wall_prob * 10000),
+            cfg.treasures, cfg.enemies, cfg.medkits, cfg.enemy_steps,
+            st.start[1] * w + st.start[0], st.goal[1] * w + st.goal[0],
+            st.player[1] * w + st.player[0], 0)),
+        _section(TAG_LEVEL, _level_body(st.walls, st.treasures, st.medkits, st.enemies)),
+    ]
+    if journal is not None and (journal.can_undo() or journal.can_redo()):
+        sections.append(_section(TAG_JOURNAL, journal.pack(w)))
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, len(sections)) + b"".join(sections)
+
+
+# ---- разбор ----
+
+def _read_cells(data: bytes, off: int, w: int) -> Tuple[List[Pos], int]:
+    (count,) = struct.unpack_from("<H", data, off)
+    off += 2
+    ids = struct.unpack_from(f"<{count}I", data, off)
+    return [(i % w, i // w) for i in ids], off + 4 * count
+
+
+def _read_level(data: bytes, off: int, w: int, h: int):
+    walls = Grid.unpack_bits(w, h, data[off:])
+    off += (w * h + 7) // 8
+    treasures, off = _read_cells(data, off, w)
+    medkits, off = _read_cells(data, off, w)
+    enemies, off = _read_cells(data, off, w)
+    return walls, set(treasures), set(medkits), enemies
+
+
+def unpack_snapshot(data: bytes) -> Optional[Snapshot]:
+    """None, если запись битая, неполная или из несовместимой версии."""
+    try:
+        magic, version, count = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return None
+        off = _HEADER.size
+        body: Dict[int, Tuple[int, int]] = {}  # тег -> (смещение, длина)
+        for _ in range(count):
+            tag, size = _SECTION.unpack_from(data, off)
+            off += _SECTION.size
+            if off + size > len(data):
+                return None
+            body.setdefault(tag, (off, size))
+            off += size
+        if TAG_STATE not in body or TAG_LEVEL not in body:
+            return None
+
+        (level, score, lives, max_lives, bombs, seed, w, h, wall_prob, treasures_n,
+         enemies_n, medkits_n, enemy_steps, start, goal, player,
+         _reserved) = _STATE.unpack_from(data, body[TAG_STATE][0])
+        cfg = LevelConfig(w, h, wall_prob / 10000, treasures_n, enemies_n, medkits_n, enemy_steps)
+        walls, treasures, medkits, enemies = _read_level(data, body[TAG_LEVEL][0], w, h)
+
+        def at(i: int) -> Pos:
+            return i % w, i // w
+
+        st = GameState(level=level, score=score, lives=lives, max_lives=max_lives,
+                       bombs=bombs, cfg=cfg, walls=walls, start=at(start), goal=at(goal),
+                       player=at(player), treasures=treasures, medkits=medkits,
+                       enemies=enemies, seed=seed)
+
+        if TAG_JOURNAL in body:
+            off, size = body[TAG_JOURNAL]
+            journal = UndoJournal.unpack(data[off:off + size], w)
+        else:
+            journal = UndoJournal()
+    except (struct.error, ValueError, IndexError):
+        return None
+    return Snapshot(st, journal)
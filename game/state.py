@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import random
+from dataclasses import dataclass, field
 from typing import List, Optional, Set
 
-from game.logic import Pos, LevelConfig, level_config, generate_level
+from game.grid import Grid
+from game.horde import Horde
+from game.logic import Pos, LevelConfig, LevelLayout, level_config, generate_level
+from game.trace import traced
+from game.world import ChunkWorld
 
 
 @dataclass
@@ -53,7 +58,7 @@ class GameState:
     bombs: int = 0
 
     cfg: LevelConfig = None  # type: ignore[assignment]
-    walls: List[List[str]] = None  # type: ignore[assignment]
+    walls: Grid = None  # type: ignore[assignment]
     start: Pos = (1, 1)
     goal: Pos = (1, 1)
     player: Pos = (1, 1)
@@ -61,22 +66,56 @@ class GameState:
     medkits: Set[Pos] = None  # type: ignore[assignment]
     enemies: List[Pos] = None  # type: ignore[assignment]
 
+    seed: int = 0  # из него раскладка уровня восстанавливается заново (см. LevelCache)
+    world: Optional[ChunkWorld] = None  # бесконечный режим: окно мира вместо уровня
+
     message: Optional[str] = None
 
-    def load_level(self) -> None:
+    # враги хода (game/horde.py): одна на карту, см. enemy_horde
+    horde: Optional[Horde] = field(default=None, repr=False, compare=False)
+
+    def enemy_horde(self) -> Horde:
+        """Horde текущей карты; новая — только когда сменилась сама карта (уровень, снимок, окно мира)."""
+        if self.horde is None or self.horde.walls is not self.walls:
+            self.horde = Horde(self.walls, self.enemies)
+        return self.horde
+
+    @traced()
+    def load_level(self, layout: Optional[LevelLayout] = None, seed: Optional[int] = None) -> None:
+        """
+        layout — заранее сгенерированная раскладка этого уровня (см. LevelPipeline),
+        seed — из которого она получена. Без layout уровень генерируется из seed
+        (или из нового случайного seed).
+        """
+        self.world = None
         self.cfg = level_config(self.level)
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
         (self.walls,
          self.start,
          self.goal,
          self.treasures,
          self.medkits,
-         self.enemies) = generate_level(self.cfg)
+         self.enemies) = layout if layout is not None else generate_level(self.cfg, seed=seed)
         self.player = self.start
         self.message = None
 
-    def restart(self) -> None:
+    def restart(self, layout: Optional[LevelLayout] = None, seed: Optional[int] = None) -> None:
+        self.level = 1
+        self.score = 0
+        self.lives = self.max_lives
+        self.bombs = 0
+        self.load_level(layout, seed)
+
+    def start_endless(self, seed: Optional[int] = None) -> None:
+        """Бесконечный режим с нуля: мир из чанков вместо уровней."""
         self.level = 1
         self.score = 0
         self.lives = self.max_lives
         self.bombs = 0
-        self.load_level()
\ No newline at end of file
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.world = ChunkWorld(seed)
+        self.world.attach(self)
@@ -0,0 +1,180 @@
+# game/trace.py
+"""
+Трассировка в формате Chrome trace events (открывается в ui.perfetto.dev
+и chrome://tracing).
+
+    with span("generate_level", level=3): ...
+    @traced()                      # имя — qualname функции
+    def load_level(...): ...
+    instant("level_cleared")
+    counter("bfs", nodes=812)      # отдельная дорожка-график в Perfetto
+
+События копятся в памяти кортежами (до MAX_EVENTS) и превращаются в JSON
+только в save(). Потоки (LevelPipeline генерирует уровни в фоне) — свои
+дорожки, tid назначается по порядку появления.
+
+Выключенный трассировщик (по умолчанию): span() отдаёт общий пустой
+контекст, обёртка traced — одна проверка флага; counter и instant
+в горячих местах стоит звать под `if tracer.enabled`.
+
+Включение: переменная окружения GAME_TRACE (1 — файл в user_data_dir
+при выходе, иначе путь к файлу) — так попадает и запуск приложения;
+в игре F4 начинает и заканчивает запись (MyGameApp._on_key_down_global;
+игровое поле забирает себе только стрелки и z/y, остальные клавиши
+доходят до приложения).
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MAX_EVENTS = 500_000  # ~50 МБ JSON; дальше события молча отбрасываются
+ENV_VAR = "GAME_TRACE"
+
+_NULL = nullcontext()
+
+# (ph, name, cat, ts_us, dur_us, tid, args)
+Event = Tuple[str, str, str, float, float, int, Optional[Dict[str, Any]]]
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "t0")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.t0 = 0.0
+
+    def __enter__(self):
+        self.t0 = self.tracer.now_us()
+        return self
+
+    def __exit__(self, *_exc):
+        tr = self.tracer
+        t1 = tr.now_us()
+        tr.emit(("X", self.name, self.cat, self.t0, t1 - self.t0, tr.tid(), self.args))
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.events: List[Event] = []
+        self.dropped = 0
+        self._t0 = time.perf_counter()
+        self._tids: Dict[int, int] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def now_us(self) -> float:
+        return (time.perf_counter() - self._t0) * 1e6
+
+    def tid(self) -> int:
+        ident = threading.get_ident()
+        tid = self._tids.get(ident)
+        if tid is None:
+            with self._lock:
+                tid = self._tids.setdefault(ident, len(self._tids) + 1)
+                self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def emit(self, ev: Event) -> None:
+        if len(self.events) < MAX_EVENTS:
+            self.events.append(ev)  # list.append атомарен под GIL
+        else:
+            self.dropped += 1
+
+    def start(self) -> None:
+        self.events = []
+        self.dropped = 0
+        self._t0 = time.perf_counter()
+        self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    # ---- запись ----
+
+    def span(self, name: str, cat: str = "game", **args):
+        if not self.enabled:
+            return _NULL
+        return _Span(self, name, cat, args or None)
+
+    def instant(self, name: str, cat: str = "game", **args) -> None:
+        if self.enabled:
+            self.emit(("i", name, cat, self.now_us(), 0.0, self.tid(), args or None))
+
+    def counter(self, name: str, cat: str = "game", **values: float) -> None:
+        """Значения одной дорожки-счётчика; каждое имя в values — своя линия."""
+        if self.enabled:
+            self.emit(("C", name, cat, self.now_us(), 0.0, self.tid(), values))
+
+    # ---- выгрузка ----
+
+    def to_json(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        out: List[Dict[str, Any]] = [
+            {"ph": "M", "name": "process_name", "pid": pid, "tid": 0,
+             "args": {"name": "game"}},
+        ]
+        for tid, name in sorted(self._thread_names.items()):
+            out.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                        "args": {"name": name}})
+        for ph, name, cat, ts, dur, tid, args in self.events:
+            ev: Dict[str, Any] = {"ph": ph, "name": name, "cat": cat,
+                                  "ts": round(ts, 3), "pid": pid, "tid": tid}
+            if ph == "X":
+                ev["dur"] = round(dur, 3)
+            elif ph == "i":
+                ev["s"] = "t"
+            if args:
+                ev["args"] = args
+            out.append(ev)
+        return {"traceEvents": out, "displayTimeUnit": "ms",
+                "otherData": {"dropped": self.dropped}}
+
+    def save(self, path: str) -> int:
+        """Записать trace JSON (через .tmp); возвращает число событий."""
+        data = self.to_json()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"), default=str)
+        os.replace(tmp, path)
+        return len(self.events)
+
+
+# общий трассировщик игры
+tracer = Tracer()
+span = tracer.span
+instant = tracer.instant
+counter = tracer.counter
+
+
+def traced(name: Optional[str] = None, cat: str = "game") -> Callable:
+    """Декоратор: вызов функции — span с именем name (по умолчанию qualname)."""
+    def deco(fn: Callable) -> Callable:
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with _Span(tracer, label, cat, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def env_target() -> Optional[str]:
+    """Значение GAME_TRACE: None — трассировка не запрошена."""
+    value = os.environ.get(ENV_VAR, "").strip()
+    return value if value and value != "0" else None
+
+
+if env_target():
+    tracer.start()  # с импорта: в трассу попадает сборка приложения
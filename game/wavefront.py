@@ -0,0 +1,72 @@
+# game/wavefront.py
+"""
+Векторный движок полей расстояний на NumPy.
+
+NumPy необязателен: на Android-сборке без него available() возвращает False,
+и game.logic работает на чистом Python.
+"""
+from typing import Tuple
+
+from game.grid import FLOOR, Grid, Pos
+
+try:
+    import numpy as np
+except ImportError:  # сборка без numpy
+    np = None
+
+
+def available() -> bool:
+    return np is not None
+
+
+def is_array(field) -> bool:
+    """Поле посчитано этим движком (np.ndarray), а не чистым BFS (list)."""
+    return np is not None and isinstance(field, np.ndarray)
+
+
+def distance_field(walls: Grid, start: Pos) -> "np.ndarray":
+    """
+    Плотное поле расстояний int32 по индексам Grid (-1 — недостижимо).
+
+    Фронт BFS расширяется целым слоем за раз: индексы фронта сдвигаются
+    на смещения соседей (±1, ±stride), отфильтровываются по маске
+    непосещённых клеток и дедуплицируются. Рамка-страж Grid гарантирует,
+    что сдвиг никогда не выходит за массив.
+    """
+    cells = walls.cells
+    n = len(cells)
+    unvisited = np.frombuffer(cells, dtype=np.uint8) == FLOOR
+    dist = np.full(n, -1, dtype=np.int32)
+
+    s = walls.idx(*start)
+    dist[s] = 0
+    unvisited[s] = False
+
+    offsets = np.array(walls.offsets, dtype=np.intp)
+    front = np.array([s], dtype=np.intp)
+    d = 0
+    while front.size:
+        d += 1
+        cand = (front[:, None] + offsets).ravel()
+        cand = np.unique(cand[unvisited[cand]])
+        unvisited[cand] = False
+        dist[cand] = d
+        front = cand
+    return dist
+
+
+def prev_field(walls: Grid, start: Pos) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    (dist, prev): prev[i] — соседняя клетка с расстоянием dist[i] - 1
+    (первая в порядке neighbors4), -1 для старта, -2 для недостижимых.
+    """
+    dist = distance_field(walls, start)
+    prev = np.full(dist.shape, -2, dtype=np.int64)
+    reached = np.flatnonzero(dist > 0)
+    # идём по смещениям в обратном порядке, чтобы первое подходящее победило
+    for off in reversed(walls.offsets):
+        nb = reached + off
+        ok = dist[nb] == dist[reached] - 1
+        prev[reached[ok]] = nb[ok]
+    prev[walls.idx(*start)] = -1
+    return dist, prev
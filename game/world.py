@@ -0,0 +1,254 @@
+# game/world.py
+"""
+Бесконечный мир из чанков CHUNK x CHUNK для бесконечного режима.
+
+Чанк генерируется детерминированно из (seed мира, cx, cy), когда игрок
+подходит к нему. В памяти держится только окно (2 * radius + 1)^2 чанков
+вокруг чанка игрока; оно собирается в обычный Grid и лежит в GameState,
+поэтому ход, поиск пути и враги работают только по загруженным чанкам.
+
+Когда игрок переходит в другой чанк, окно пересобирается. Из окна в
+чанки сначала записываются стены (бомбы), предметы и враги. Уходящий из
+окна чанк, в котором игрок что-то изменил, сжимается: стены по биту на
+клетку, сокровища и аптечки по байту. Нетронутый чанк просто
+выбрасывается, потому что его можно сгенерировать заново.
+
+Сжатых чанков не больше max_compact (LRU): самые давние правки
+забываются, и чанк потом генерируется заново. Так память ограничена,
+как бы далеко ни ушёл игрок. Враги при выгрузке не запоминаются:
+загруженный заново чанк получает своих исходных врагов.
+
+Чтобы чанки всегда были связаны, средние строка и столбец каждого чанка —
+коридоры без стен. Они стыкуются с коридорами соседей.
+"""
+import random
+import struct
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from game.grid import FLOOR, Grid, Pos, pack_bits, unpack_bits
+from game.logic import LevelConfig, wall_table
+
+if TYPE_CHECKING:
+    from game.state import GameState
+
+CHUNK = 16          # сторона чанка в клетках; локальный индекс y * CHUNK + x влезает в байт
+RADIUS = 1          # окно — (2 * RADIUS + 1)^2 чанков
+MAX_COMPACT = 1024  # сжатых изменённых чанков (по ~40 байт)
+
+MID = CHUNK // 2    # коридоры чанка: строка и столбец MID
+
+ChunkKey = Tuple[int, int]
+
+
+@dataclass
+class EndlessConfig:
+    wall_prob: float = 0.24
+    treasures: int = 2          # на чанк
+    enemies: int = 1            # на чанк (кроме стартового)
+    medkit_chance: float = 0.25
+    enemy_steps: int = 1
+
+
+@dataclass
+class Chunk:
+    walls: bytearray                 # CHUNK * CHUNK, построчно
+    treasures: Set[int]              # локальные индексы
+    medkits: Set[int]
+    enemies: List[int] = field(default_factory=list)
+    dirty: bool = False              # стены или предметы отличаются от сгенерированных
+
+
+class ChunkWorld:
+    def __init__(self, seed: int, cfg: Optional[EndlessConfig] = None,
+                 radius: int = RADIUS, max_compact: int = MAX_COMPACT):
+        self.seed = seed
+        self.cfg = cfg if cfg is not None else EndlessConfig()
+        self.radius = radius
+        self.max_compact = max_compact
+        self.span = 2 * radius + 1          # окно в чанках
+        self.size = self.span * CHUNK       # окно в клетках
+        self.loaded: Dict[ChunkKey, Chunk] = {}
+        self.compact: "OrderedDict[ChunkKey, bytes]" = OrderedDict()
+        self.center: ChunkKey = (0, 0)
+        self.origin: Pos = (-radius * CHUNK, -radius * CHUNK)  # мировые координаты клетки (0, 0) окна
+        self._table = wall_table(self.cfg.wall_prob)
+        self.generated = 0
+        self.restored = 0
+        self.dropped = 0  # сжатых чанков, забытых из-за лимита
+
+    # ---- координаты ----
+
+    def to_world(self, p: Pos) -> Pos:
+        return p[0] + self.origin[0], p[1] + self.origin[1]
+
+    def to_window(self, p: Pos) -> Pos:
+        return p[0] - self.origin[0], p[1] - self.origin[1]
+
+    @staticmethod
+    def chunk_of(p: Pos) -> ChunkKey:
+        return p[0] // CHUNK, p[1] // CHUNK
+
+    def window_keys(self, center: ChunkKey) -> List[ChunkKey]:
+        cx, cy = center
+        r = self.radius
+        return [(cx + dx, cy + dy) for dy in range(-r, r + 1) for dx in range(-r, r + 1)]
+
+    def level_config(self) -> LevelConfig:
+        """Конфиг окна для GameState (рендер и ход берут из него размеры и шаги врагов)."""
+        c = self.cfg
+        return LevelConfig(self.size, self.size, c.wall_prob, c.treasures, c.enemies, 0, c.enemy_steps)
+
+    # ---- чанки ----
+
+    def _generate(self, key: ChunkKey) -> Chunk:
+        rng = random.Random(f"{self.seed}:{key[0]}:{key[1]}")
+        walls = bytearray(rng.randbytes(CHUNK * CHUNK).translate(self._table))
+        walls[MID * CHUNK:(MID + 1) * CHUNK] = bytes(CHUNK)  # коридор-строка
+        walls[MID::CHUNK] = bytes(CHUNK)                     # коридор-столбец
+
+        free = [i for i, c in enumerate(walls) if c == FLOOR and i != MID * CHUNK + MID]
+        k_med = 1 if rng.random() < self.cfg.medkit_chance else 0
+        k_en = 0 if key == (0, 0) else self.cfg.enemies  # старт без врагов
+        picked = rng.sample(free, min(len(free), self.cfg.treasures + k_med + k_en))
+        treasures = set(picked[:self.cfg.treasures])
+        medkits = set(picked[self.cfg.treasures:self.cfg.treasures + k_med])
+        enemies = picked[self.cfg.treasures + k_med:]
+        return Chunk(walls, treasures, medkits, enemies)
+
+    def _pack(self, chunk: Chunk) -> bytes:
+        t = bytes(sorted(chunk.treasures))
+        m = bytes(sorted(chunk.medkits))
+        return b"".join((pack_bits(chunk.walls), struct.pack("<B", len(t)), t, m))
+
+    def _unpack(self, key: ChunkKey, data: bytes) -> Chunk:
+        n = CHUNK * CHUNK
+        off = n // 8
+        walls = bytearray(unpack_bits(data[:off], n))
+        (nt,) = struct.unpack_from("<B", data, off)
+        t = set(data[off + 1:off + 1 + nt])
+        m = set(data[off + 1 + nt:])
+        # враги не хранятся — берём исходных из генерации
+        enemies = [i for i in self._generate(key).enemies if walls[i] == FLOOR
+                   and i not in t and i not in m]
+        return Chunk(walls, t, m, enemies, dirty=True)
+
+    def _load(self, key: ChunkKey) -> Chunk:
+        data = self.compact.pop(key, None)
+        if data is not None:
+            self.restored += 1
+            return self._unpack(key, data)
+        self.generated += 1
+        return self._generate(key)
+
+    def _evict(self, key: ChunkKey) -> None:
+        chunk = self.loaded.pop(key)
+        if not chunk.dirty:
+            return
+        self.compact[key] = self._pack(chunk)
+        self.compact.move_to_end(key)
+        while len(self.compact) > self.max_compact:
+            self.compact.popitem(last=False)
+            self.dropped += 1
+
+    # ---- окно <-> GameState ----
+
+    def attach(self, st: "GameState") -> None:
+        """Начать мир: окно вокруг стартового чанка, игрок на перекрёстке коридоров."""
+        self.loaded.clear()
+        self.compact.clear()
+        self.center = (0, 0)
+        self.origin = (-self.radius * CHUNK, -self.radius * CHUNK)
+        for key in self.window_keys(self.center):
+            self.loaded[key] = self._load(key)
+        st.cfg = self.level_config()
+        st.goal = (-1, -1)  # портала нет
+        st.start = self.to_window((MID, MID))
+        st.player = st.start
+        st.message = None
+        self._build_window(st)
+
+    def follow(self, st: "GameState") -> bool:
+        """Пересобрать окно, если игрок ушёл из центрального чанка. True — окно сдвинулось."""
+        key = self.chunk_of(self.to_world(st.player))
+        if key == self.center:
+            return False
+        self._sync(st)
+
+        wanted = self.window_keys(key)
+        for k in [k for k in self.loaded if k not in wanted]:
+            self._evict(k)
+        # враги идут за игроком из чанка в чанк, а новые чанки приносят своих:
+        # новым достаются только места, оставшиеся до лимита окна
+        budget = self.cfg.enemies * len(wanted) - sum(len(c.enemies) for c in self.loaded.values())
+        for k in wanted:
+            if k not in self.loaded:
+                chunk = self.loaded[k] = self._load(k)
+                del chunk.enemies[max(0, budget):]
+                budget -= len(chunk.enemies)
+
+        player = self.to_world(st.player)
+        self.center = key
+        self.origin = ((key[0] - self.radius) * CHUNK, (key[1] - self.radius) * CHUNK)
+        st.player = self.to_window(player)
+        # точка возрождения — перекрёсток коридоров текущего чанка
+        st.start = self.to_window((key[0] * CHUNK + MID, key[1] * CHUNK + MID))
+        self._build_window(st)
+        return True
+
+    def _sync(self, st: "GameState") -> None:
+        """Записать состояние окна (стены, предметы, враги) обратно в чанки."""
+        walls = st.walls
+        by_chunk_t = self._split(st.treasures)
+        by_chunk_m = self._split(st.medkits)
+        by_chunk_e = self._split(st.enemies)
+        for key, chunk in self.loaded.items():
+            wx0, wy0 = key[0] * CHUNK, key[1] * CHUNK
+            x0, y0 = self.to_window((wx0, wy0))
+            for y in range(CHUNK):
+                i = walls.idx(x0, y0 + y)
+                row = walls.cells[i:i + CHUNK]
+                if row != chunk.walls[y * CHUNK:(y + 1) * CHUNK]:
+                    chunk.walls[y * CHUNK:(y + 1) * CHUNK] = row
+                    chunk.dirty = True
+            t = set(by_chunk_t.get(key, ()))
+            m = set(by_chunk_m.get(key, ()))
+            if t != chunk.treasures or m != chunk.medkits:
+                chunk.treasures, chunk.medkits = t, m
+                chunk.dirty = True
+            chunk.enemies = by_chunk_e.get(key, [])
+
+    def _split(self, positions: Iterable[Pos]) -> Dict[ChunkKey, List[int]]:
+        """Позиции окна -> {чанк: [локальные индексы]}."""
+        out: Dict[ChunkKey, List[int]] = {}
+        ox, oy = self.origin
+        for x, y in positions:
+            wx, wy = x + ox, y + oy
+            key = (wx // CHUNK, wy // CHUNK)
+            out.setdefault(key, []).append((wy % CHUNK) * CHUNK + wx % CHUNK)
+        return out
+
+    def _build_window(self, st: "GameState") -> None:
+        walls = Grid(self.size, self.size)
+        treasures: Set[Pos] = set()
+        medkits: Set[Pos] = set()
+        enemies: List[Pos] = []
+        for key in self.window_keys(self.center):
+            chunk = self.loaded[key]
+            x0, y0 = self.to_window((key[0] * CHUNK, key[1] * CHUNK))
+            for y in range(CHUNK):
+                i = walls.idx(x0, y0 + y)
+                walls.cells[i:i + CHUNK] = chunk.walls[y * CHUNK:(y + 1) * CHUNK]
+            for dst, src in ((treasures, chunk.treasures), (medkits, chunk.medkits)):
+                dst.update((x0 + i % CHUNK, y0 + i // CHUNK) for i in src)
+            enemies.extend((x0 + i % CHUNK, y0 + i // CHUNK) for i in chunk.enemies)
+        st.walls = walls
+        st.treasures = treasures
+        st.medkits = medkits
+        # враг не может стоять на игроке при загрузке
+        st.enemies = [e for e in enemies if e != st.player]
+
+    def stats(self) -> Dict[str, int]:
+        return {"loaded": len(self.loaded), "compact": len(self.compact),
+                "generated": self.generated, "restored": self.restored, "dropped": self.dropped}
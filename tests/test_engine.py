@@ -0,0 +1,100 @@
+# tests/test_engine.py
+"""События TurnResult на уровне из фиксированного seed, без окна."""
+import random
+
+import pytest
+
+from game import engine
+from game.grid import FLOOR, WALL
+from game.logic import bfs_next_step, neighbors4
+from game.state import GameState
+
+SEED = 7
+
+
+@pytest.fixture
+def st():
+    """Уровень 1 без врагов и аптечек — события зависят только от маршрута."""
+    st = GameState(level=1)
+    st.load_level(seed=SEED)
+    st.enemies = []
+    st.medkits = set()
+    return st
+
+
+def walk(st, target, rng):
+    """Идёт к target по кратчайшему пути; события всех ходов подряд."""
+    kinds = []
+    while st.player != target and not st.message:
+        x, y = st.player
+        nx, ny = bfs_next_step(st.walls, st.player, target)
+        res = engine.play_turn(st, nx - x, ny - y, rng)
+        assert res.acted
+        kinds += [e.kind for e in res.events]
+    return kinds
+
+
+def test_treasures_then_level_cleared(st):
+    rng = random.Random(SEED)
+    treasures = sorted(st.treasures)
+    assert treasures
+    kinds = []
+    for t in treasures:
+        if t in st.treasures:
+            kinds += walk(st, t, rng)
+    assert kinds == [engine.TREASURE] * len(treasures)
+    assert st.score == engine.TREASURE_SCORE * len(treasures)
+
+    score = st.score
+    kinds = walk(st, st.goal, rng)
+    assert kinds == [engine.LEVEL_CLEARED]
+    assert st.message
+    assert st.score == score + 50 + st.level * 10
+
+    # пройденный уровень ходов не принимает
+    res = engine.play_turn(st, 1, 0, rng)
+    assert not res.acted and not res.events
+
+
+def test_hit_then_game_over(st):
+    rng = random.Random(SEED)
+    step = bfs_next_step(st.walls, st.start, st.goal)
+    dx, dy = step[0] - st.start[0], step[1] - st.start[1]
+
+    st.enemies = [step]
+    res = engine.play_turn(st, dx, dy, rng)
+    assert [e.kind for e in res.events] == [engine.HIT]
+    assert res.events[0].pos == step
+    assert st.player == st.start
+    assert st.lives == st.max_lives - 1
+    assert step not in st.enemies  # враг отправлен подальше
+
+    st.lives = 1
+    st.enemies = [step]
+    res = engine.play_turn(st, dx, dy, rng)
+    assert [e.kind for e in res.events] == [engine.HIT, engine.GAME_OVER]
+    assert st.lives == 0
+
+
+def test_bomb_events(st):
+    rng = random.Random(SEED)
+    st.bombs = 0
+    res = engine.use_bomb(st, rng)
+    assert [e.kind for e in res.events] == [engine.NO_BOMBS]
+    assert not res.acted
+
+    # игрок внутри поля, все соседи — пол
+    st.player = (3, 3)
+    for x, y in [st.player] + neighbors4(st.player):
+        st.walls.set(x, y, FLOOR)
+    st.bombs = 1
+    res = engine.use_bomb(st, rng)
+    assert [e.kind for e in res.events] == [engine.NO_WALL]
+    assert not res.acted and st.bombs == 1
+
+    wall = (4, 3)
+    st.walls.set(*wall, WALL)
+    res = engine.use_bomb(st, rng)
+    assert [(e.kind, e.pos) for e in res.events] == [(engine.BOMB, wall)]
+    assert res.acted and st.bombs == 0
+    assert not st.walls.is_wall(*wall)
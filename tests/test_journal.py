@@ -0,0 +1,75 @@
+# tests/test_journal.py
+"""UndoJournal: отмена/повтор после упаковки в снимок и разбор битой секции."""
+import random
+
+import pytest
+
+from game import engine
+from game.journal import UndoJournal
+from game.snapshot import pack_snapshot, unpack_snapshot
+from game.state import GameState
+
+MOVES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+TURNS = 120
+
+
+def state_key(st):
+    return (st.score, st.lives, st.bombs, st.player, frozenset(st.treasures),
+            frozenset(st.medkits), tuple(st.enemies), bytes(st.walls.cells))
+
+
+def play(seed):
+    """Уровень из seed и TURNS ходов с бомбами; состояния после каждого записанного хода."""
+    rng = random.Random(seed)
+    st = GameState(level=1 + seed % 8)
+    st.load_level(seed=seed)
+    st.max_lives = st.lives = 999  # аптечки и столкновения не кончают игру
+    journal = UndoJournal()
+    states = [state_key(st)]
+    for _ in range(TURNS):
+        journal.begin(st)
+        if rng.random() < 0.15:
+            st.bombs += 1
+            engine.use_bomb(st, rng)
+        else:
+            engine.play_turn(st, *rng.choice(MOVES), rng)
+        st.message = None  # пройденный уровень не мешает ходить дальше
+        if journal.commit(st) is not None:
+            states.append(state_key(st))
+        else:
+            states[-1] = state_key(st)
+    return st, journal, states
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_round_trip_undo_redo(seed):
+    st, journal, states = play(seed)
+    data = pack_snapshot(st, journal)
+    snap = unpack_snapshot(data)
+    assert pack_snapshot(st, snap.journal) == data  # неразобранная секция отдаётся как есть
+
+    restored = GameState()
+    snap.apply(restored)
+    assert state_key(restored) == states[-1]
+    j = snap.journal
+    n = min(len(states) - 1, len(journal.undo))
+    assert n > 0
+    for k in range(1, n + 1):
+        assert j.undo_step(restored)
+        assert state_key(restored) == states[-1 - k]
+    assert not j.undo_step(restored)
+    for k in range(n - 1, -1, -1):
+        assert j.redo_step(restored)
+        assert state_key(restored) == states[-1 - k]
+    assert not j.redo_step(restored)
+
+
+def test_truncated_section_gives_empty_journal():
+    st, journal, _states = play(1)
+    w = st.walls.w
+    data = journal.pack(w)
+    for cut in (len(data) // 2, len(data) - 1, 3):
+        j = UndoJournal.unpack(data[:cut], w)
+        assert not j.undo_step(st)
+        assert not j.can_undo() and not j.can_redo()
+        assert j.pack(w) == UndoJournal().pack(w)
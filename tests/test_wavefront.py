@@ -0,0 +1,24 @@
+# tests/test_wavefront.py
+"""NumPy-движок полей совпадает с чистым BFS на картах generate_level."""
+import random
+
+import pytest
+
+from game import logic, wavefront
+from tools.check_wavefront import check_level
+
+if not wavefront.available():
+    pytest.skip("NumPy не установлен", allow_module_level=True)
+
+PER_LEVEL = 100  # 20 уровней — 2000 карт
+
+
+@pytest.mark.parametrize("level", range(1, 21))
+def test_distance_field_matches_bfs(level):
+    cfg = logic.level_config(level)
+    rng = random.Random(level)
+    failed = 0
+    for n in range(PER_LEVEL):
+        walls = logic.generate_level(cfg, seed=level * 10_000 + n)[0]
+        failed += check_level(walls, rng, starts=2) > 0
+    assert failed == 0
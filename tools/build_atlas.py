@@ -0,0 +1,112 @@
+# tools/build_atlas.py
+"""
+Сборка атласа игровой графики: assets/game.atlas + assets/game-N.png.
+
+Запуск из корня репозитория (нужен Pillow, в игре он не нужен):
+    python -m tools.build_atlas
+    python -m tools.build_atlas --check      # только показать размеры
+
+Исходники — большие PNG (спрайты 1024x1024, иконки до 1328x1328).
+На экране спрайт занимает ~0.9 клетки, а клетка — от 28dp до ~3x при
+зуме, поэтому каждая картинка уменьшается до своего потолка (SIZES) с
+сохранением пропорций и пакуется в одну текстуру. Игра берёт текстуры
+по именам через game/atlas.py; без атласа — из исходных PNG.
+
+После правки картинок в assets/ атлас нужно пересобрать и закоммитить.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+ATLAS_NAME = "assets/game"   # -> assets/game.atlas, assets/game-0.png
+PAGE_SIZE = (1024, 576)  # всё помещается на одну страницу
+PADDING = 2
+
+# имя в атласе -> (исходник, сторона в пикселях)
+SPRITE_PX = 128  # спрайт в клетке до ~120px при максимальном зуме
+ICON_PX = 192    # кнопки dp(72) * scale на экранах xxhdpi
+SIZES: Dict[str, Tuple[str, int]] = {
+    "player": ("assets/player.png", SPRITE_PX),
+    "skeleton": ("assets/skeleton.png", SPRITE_PX),
+    **{f"explosion_{i}": (f"assets/explosion_{i}.png", SPRITE_PX) for i in range(6)},
+    "bomb": ("assets/icons/bomb.png", ICON_PX),
+    "pause": ("assets/icons/pause.png", ICON_PX),
+    "restart": ("assets/icons/restart.png", ICON_PX),
+    "undo": ("assets/icons/undo.png", ICON_PX),
+    "redo": ("assets/icons/redo.png", ICON_PX),
+    "circle_glow": ("assets/ui/circle_glow.png", ICON_PX),
+}
+
+
+def fit(size: Tuple[int, int], limit: int) -> Tuple[int, int]:
+    """Размер, вписанный в квадрат limit; меньшие картинки не растягиваются."""
+    w, h = size
+    k = min(1.0, limit / max(w, h))
+    return max(1, round(w * k)), max(1, round(h * k))
+
+
+def parse_page(text: str) -> Tuple[int, int]:
+    w, _, h = text.partition("x")
+    return int(w), int(h or w)
+
+
+def downscale(out_dir: str) -> List[str]:
+    """Уменьшенные RGBA-копии в out_dir; имя файла = имя в атласе."""
+    from PIL import Image
+
+    files: List[str] = []
+    for name, (src, limit) in SIZES.items():
+        with Image.open(src) as im:
+            im = im.convert("RGBA")
+            target = fit(im.size, limit)
+            if target != im.size:
+                im = im.resize(target, Image.LANCZOS)
+            path = os.path.join(out_dir, f"{name}.png")
+            im.save(path, optimize=True)
+            files.append(path)
+            print(f"{name:<14}{src:<30}{'x'.join(map(str, target)):>10}")
+    return files
+
+
+def build(atlas_name: str = ATLAS_NAME, page: Tuple[int, int] = PAGE_SIZE) -> Optional[str]:
+    from kivy.atlas import Atlas
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = downscale(tmp)
+        res = Atlas.create(atlas_name, files, page, padding=PADDING)
+    if not res:
+        return None
+    out, meta = res
+    pages = len(meta)
+    if pages > 1:
+        print(f"внимание: атлас занял {pages} страниц — увеличьте --page")
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--page", type=parse_page, default=PAGE_SIZE, metavar="WxH",
+                    help="размер страницы атласа")
+    ap.add_argument("--check", action="store_true", help="только показать итоговые размеры")
+    args = ap.parse_args(argv)
+
+    if args.check:
+        from PIL import Image
+        for name, (src, limit) in SIZES.items():
+            with Image.open(src) as im:
+                print(f"{name:<14}{'x'.join(map(str, im.size)):>10} -> "
+                      f"{'x'.join(map(str, fit(im.size, limit)))}")
+        return 0
+
+    out = build(page=args.page)
+    if out is None:
+        print("атлас не собран")
+        return 1
+    print(f"готово: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# tools/check_wavefront.py
+"""
+Сверка NumPy-движка полей (game.wavefront) с чистым BFS (game.logic).
+
+Запуск из корня репозитория:
+    python -m tools.check_wavefront [--levels 20] [--per-level 200] [--seed 1]
+
+Для каждого уровня генерирует --per-level карт через generate_level
+и сравнивает поле расстояний из нескольких случайных стартов, а также
+проверяет, что prev_field даёт кратчайшие пути. Код выхода 1 при расхождении.
+Та же сверка с фиксированными seed идёт в tests/test_wavefront.py.
+"""
+import argparse
+import random
+import sys
+
+from game import logic, wavefront
+
+
+def check_level(walls, rng: random.Random, starts: int) -> int:
+    """Возвращает число расхождений на одной карте."""
+    free = [(x, y) for y in range(walls.h) for x in range(walls.w) if not walls.is_wall(x, y)]
+    errors = 0
+    for start in rng.sample(free, min(starts, len(free))):
+        ref = logic.bfs_distances(walls, start)
+        field = wavefront.distance_field(walls, start)
+
+        got = {walls.pos(i): int(field[i]) for i in logic.field_cells(field)}
+        if got != ref:
+            errors += 1
+            continue
+
+        # prev: каждый шаг назад уменьшает расстояние ровно на 1
+        _dist, prev = wavefront.prev_field(walls, start)
+        for p, d in ref.items():
+            i = walls.idx(*p)
+            j = int(prev[i])
+            if d == 0:
+                ok = j == -1
+            else:
+                ok = j >= 0 and int(field[j]) == d - 1 and abs(i - j) in (1, walls.stride)
+            if not ok:
+                errors += 1
+                break
+    return errors
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--levels", type=int, default=20)
+    ap.add_argument("--per-level", type=int, default=200)
+    ap.add_argument("--starts", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    if not wavefront.available():
+        print("NumPy не установлен — сверять нечего.")
+        return 1
+
+    logic.set_field_backend("python")
+    random.seed(args.seed)
+    rng = random.Random(args.seed)
+
+    total = 0
+    failed = 0
+    for level in range(1, args.levels + 1):
+        cfg = logic.level_config(level)
+        for _ in range(args.per_level):
+            walls = logic.generate_level(cfg)[0]
+            errs = check_level(walls, rng, args.starts)
+            total += 1
+            if errs:
+                failed += 1
+                print(f"уровень {level}: расхождение на карте\n" + "\n".join(walls.to_rows()))
+    print(f"карт проверено: {total}, с расхождениями: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
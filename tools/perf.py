@@ -0,0 +1,452 @@
+# tools/perf.py
+"""
+Набор замеров горячих функций game.logic с базовой линией.
+
+Запуск из корня репозитория:
+    python -m tools.perf                          # замерить и напечатать
+    python -m tools.perf --save base.json         # сохранить базовую линию
+    python -m tools.perf --compare base.json      # сравнить с ней
+    python -m tools.perf -k bfs -k 128x128        # только подходящие замеры
+    python -m tools.perf -k /прежний              # только прежние реализации
+
+Для каждого замера печатаются операции в секунду и перцентили времени
+одной операции. В режиме --compare замер считается регрессией, если его
+медиана выросла больше чем на --threshold; тогда код выхода 1.
+
+Входы фиксированы (--seed), поэтому результаты разных версий сравнимы.
+Рядом с текущим кодом меряются прежние реализации горячих мест (замеры
+с суффиксом /прежний): заливка вместо A*/JPS, выборка стен по клетке,
+поштучный ход врагов. По ним видно, сколько дала каждая замена, и они
+не меняются от версии к версии — удобная точка отсчёта для машины.
+
+После таблицы замеров generate_level печатается среднее число попыток
+и время генерации на вызов (из GenStats) для каждого level_config,
+рядом — попытки прежней выборки стен на тех же уровнях.
+"""
+import argparse
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from game import engine, logic, pathfind
+from game.grid import WALL, Grid, Pos
+from game.horde import Horde
+from game.state import GameState
+
+# синтетические сетки (w, h) с долей стен 0.25
+GRID_SIZES = ((20, 12), (64, 64), (128, 128), (256, 256), (512, 512))
+ENEMY_COUNTS = (1, 6, 50, 200, 500)
+TURN_SERIES = 50  # ходов в одном замере play_turn
+FORMAT_VERSION = 1
+
+
+@dataclass
+class Result:
+    ops: float      # операций в секунду (по медиане)
+    p50_us: float
+    p90_us: float
+    p99_us: float
+    samples: int
+
+
+@dataclass
+class GenTally:
+    """Сумма GenStats (или попыток прежней выборки) по всем вызовам замера."""
+    cfg: logic.LevelConfig
+    runs: int = 0
+    attempts: int = 0
+    seconds: float = 0.0
+
+    def add(self, attempts: int, seconds: float) -> None:
+        self.runs += 1
+        self.attempts += attempts
+        self.seconds += seconds
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[], object]
+    tally: Optional[GenTally] = None  # только у замеров generate_level
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Перцентиль q (0..1) по уже отсортированным значениям, с интерполяцией."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(fn: Callable[[], object], budget: float, min_samples: int = 5) -> Result:
+    """
+    Время одной операции: быстрые функции вызываются пачками (пачка — не
+    меньше ~1 мс), выборка набирается, пока не кончится budget секунд.
+    """
+    t0 = time.perf_counter()
+    fn()  # прогрев; заодно оценка длительности
+    once = max(time.perf_counter() - t0, 1e-7)
+    batch = max(1, int(0.001 / once))
+
+    per_op: List[float] = []
+    deadline = time.perf_counter() + budget
+    while len(per_op) < min_samples or time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        per_op.append((time.perf_counter() - t0) / batch)
+    per_op.sort()
+    p50 = percentile(per_op, 0.5)
+    return Result(ops=1.0 / p50 if p50 > 0 else 0.0,
+                  p50_us=p50 * 1e6,
+                  p90_us=percentile(per_op, 0.9) * 1e6,
+                  p99_us=percentile(per_op, 0.99) * 1e6,
+                  samples=len(per_op))
+
+
+# ---- входы ----
+
+def random_grid(w: int, h: int, wall_prob: float, rng: random.Random) -> Grid:
+    walls = Grid(w, h)
+    cells = walls.cells
+    for y in range(h):
+        i = walls.idx(0, y)
+        for x in range(w):
+            if rng.random() < wall_prob:
+                cells[i + x] = WALL
+    return walls
+
+
+def far_pair(walls: Grid, rng: random.Random) -> Optional[tuple]:
+    """Случайный старт и самая далёкая от него достижимая клетка."""
+    free = [(x, y) for y in range(walls.h) for x in range(walls.w) if not walls.is_wall(x, y)]
+    if not free:
+        return None
+    start = rng.choice(free)
+    dist = logic.bfs_distances(walls, start)
+    goal = max(dist, key=dist.get)
+    return start, goal
+
+
+# ---- прежние реализации (замеры /прежний) ----
+
+def legacy_next_step(walls: Grid, start: Pos, goal: Pos) -> Optional[Pos]:
+    """Прежний bfs_next_step: заливка всей карты и проход по цепочке prev."""
+    if start == goal:
+        return start
+    prev, _order = logic.bfs_prev_field(walls, start)
+    s = walls.idx(*start)
+    cur = walls.idx(*goal)
+    if prev[cur] == -2:
+        return None
+    while prev[cur] != s:
+        cur = prev[cur]
+    return walls.pos(cur)
+
+
+def legacy_generate_walls(cfg: logic.LevelConfig, rng: random.Random) -> int:
+    """Прежняя выборка стен rng.random() на клетку до первой карты с путём; число попыток."""
+    start = (1, 1)
+    goal = (cfg.w - 2, cfg.h - 2)
+    attempts = 0
+    while True:
+        attempts += 1
+        walls = Grid(cfg.w, cfg.h, fill=WALL)
+        for y in range(1, cfg.h - 1):
+            for x in range(1, cfg.w - 1):
+                if rng.random() >= cfg.wall_prob:
+                    walls.cells[walls.idx(x, y)] = 0
+        walls.cells[walls.idx(*start)] = 0
+        walls.cells[walls.idx(*goal)] = 0
+        if logic.bfs_field(walls, start)[0][walls.idx(*goal)] >= 0:
+            return attempts
+
+
+def legacy_enemy_turn(walls: Grid, enemies: List[Pos], player: Pos, steps: int,
+                      dist: Dict[Pos, int]) -> List[Pos]:
+    """Прежний enemy_turn: список вариантов и сортировка на каждый шаг, занятость — set."""
+    inf = 10 ** 9
+    new_positions: List[Pos] = []
+    occupied = set(enemies)
+    for cur in enemies:
+        occupied.discard(cur)
+        if cur != player:
+            for _ in range(steps):
+                opts = [p for p in logic.neighbors4(cur)
+                        if not walls.is_wall(*p) and p not in occupied]
+                if not opts:
+                    break
+                opts.sort(key=lambda p: dist.get(p, inf))
+                best = opts[0]
+                if dist.get(best, inf) >= inf:
+                    best = random.choice(opts)
+                cur = best
+                if cur == player:
+                    break
+        new_positions.append(cur)
+        occupied.add(cur)
+    return new_positions
+
+
+def _turns(level: Optional[int], seed: int) -> Callable[[], object]:
+    """
+    TURN_SERIES ходов engine.play_turn подряд (без окна) с одной и той же
+    стартовой позиции: случайные ходы и бомбы из фиксированного rng, при
+    проигрыше жизни восполняются, на пройденном уровне серия кончается.
+    level None — бесконечный режим (в замер входит start_endless), ходы
+    с уклоном вправо, чтобы окно сдвигалось.
+    """
+    dirs = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    layout = None
+    if level is not None:
+        layout = logic.generate_level(logic.level_config(level), seed=seed + level)
+
+    def series() -> None:
+        rng = random.Random(seed)
+        st = GameState(level=level or 1)
+        if layout is None:
+            st.start_endless(seed=seed)
+        else:
+            walls, start, goal, treasures, medkits, enemies = layout
+            st.load_level((walls.copy(), start, goal, set(treasures), set(medkits),
+                           list(enemies)), seed + level)
+        for _ in range(TURN_SERIES):
+            if rng.random() < 0.05:
+                st.bombs = 1
+                engine.use_bomb(st, rng)
+            dx, dy = (1, 0) if layout is None and rng.random() < 0.5 else rng.choice(dirs)
+            res = engine.play_turn(st, dx, dy, rng)
+            if res.has(engine.GAME_OVER):
+                st.lives = st.max_lives
+            elif res.has(engine.LEVEL_CLEARED):
+                break
+    return series
+
+
+# ---- набор замеров ----
+
+def _generate(cfg: logic.LevelConfig, seeds: Iterator[int],
+              tally: GenTally) -> Callable[[], object]:
+    def gen() -> logic.LevelLayout:
+        stats = logic.GenStats()
+        layout = logic.generate_level(cfg, stats, seed=next(seeds))
+        tally.add(stats.attempts, stats.seconds)
+        return layout
+    return gen
+
+
+def _legacy_generate(cfg: logic.LevelConfig, rng: random.Random,
+                     tally: GenTally) -> Callable[[], object]:
+    def gen() -> int:
+        t0 = time.perf_counter()
+        attempts = legacy_generate_walls(cfg, rng)
+        tally.add(attempts, time.perf_counter() - t0)
+        return attempts
+    return gen
+
+
+def _level_map(level: int, seed: int) -> Tuple[Grid, Pos, List[Pos]]:
+    walls, start, _goal, _t, _m, enemies = logic.generate_level(logic.level_config(level), seed=seed)
+    return walls, start, enemies
+
+
+def build_cases(seed: int) -> List[Case]:
+    rng = random.Random(seed)
+    cases: List[Case] = []
+
+    grids: List[Tuple[str, Grid]] = []
+    for level in (1, 5, 10, 20):
+        grids.append((f"уровень {level}", _level_map(level, seed)[0]))
+    for w, h in GRID_SIZES:
+        grids.append((f"{w}x{h}", random_grid(w, h, 0.25, rng)))
+
+    finder = pathfind.PathFinder()
+    for name, walls in grids:
+        pair = far_pair(walls, rng)
+        if pair is None:
+            continue
+        start, goal = pair
+        cases.append(Case(f"bfs_distances/{name}",
+                          lambda walls=walls, start=start: logic.bfs_distances(walls, start)))
+        cases.append(Case(f"bfs_next_step/{name}",
+                          lambda walls=walls, start=start, goal=goal:
+                          logic.bfs_next_step(walls, start, goal)))
+        for method in ("astar", "jps"):
+            cases.append(Case(f"bfs_next_step/{name}/{method}",
+                              lambda walls=walls, start=start, goal=goal, method=method:
+                              finder.next_step(walls, start, goal, method)))
+        cases.append(Case(f"bfs_next_step/{name}/прежний",
+                          lambda walls=walls, start=start, goal=goal:
+                          legacy_next_step(walls, start, goal)))
+
+    for level in range(1, 21):
+        seeds = itertools.count(seed * 1000)
+        cfg = logic.level_config(level)
+        tally = GenTally(cfg)
+        cases.append(Case(f"generate_level/{level}", _generate(cfg, seeds, tally), tally))
+        if level in (1, 5, 10, 20):
+            # у прежнего способа — только стены и проверка пути, без расстановки
+            tally = GenTally(cfg)
+            cases.append(Case(f"generate_level/{level}/прежний",
+                              _legacy_generate(cfg, random.Random(seed + level), tally), tally))
+
+    # враги: поле от игрока считается внутри enemy_turn, как в игре без кэша;
+    # Horde одна на карту (GameState.enemy_horde), ход — с исходной расстановки
+    for w, h in ((20, 12), (128, 128)):
+        walls = random_grid(w, h, 0.25, rng)
+        free = [(x, y) for y in range(h) for x in range(w) if not walls.is_wall(x, y)]
+        player = free[0]
+        for count in ENEMY_COUNTS:
+            if count >= len(free):
+                continue
+            enemies = rng.sample(free[1:], count)
+            horde = Horde(walls, enemies)
+
+            def turn(walls=walls, enemies=enemies, player=player, horde=horde):
+                horde.set_positions(enemies)
+                return logic.enemy_turn(walls, enemies, player, 2, horde=horde)
+
+            cases.append(Case(f"enemy_turn/{w}x{h}/{count}", turn))
+            # временная Horde на каждый ход и прежний поштучный ход со своим BFS
+            cases.append(Case(f"enemy_turn/{w}x{h}/{count}/временная",
+                              lambda walls=walls, enemies=enemies, player=player:
+                              logic.enemy_turn(walls, enemies, player, 2)))
+            cases.append(Case(f"enemy_turn/{w}x{h}/{count}/прежний",
+                              lambda walls=walls, enemies=enemies, player=player:
+                              legacy_enemy_turn(walls, enemies, player, 2,
+                                                logic.bfs_distances(walls, player))))
+
+    for level in (1, 5, 10, 20, None):
+        name = str(level) if level is not None else "бесконечный"
+        cases.append(Case(f"play_turn/{name}/{TURN_SERIES}", _turns(level, seed)))
+    return cases
+
+
+# ---- базовая линия ----
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "field_backend": logic.get_field_backend(),
+        "numpy": str(logic.wavefront.available()),
+    }
+
+
+def save_baseline(path: str, results: Dict[str, Result]) -> None:
+    data = {
+        "format": FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": environment(),
+        "results": {name: asdict(r) for name, r in results.items()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Result]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{path}: неизвестный формат базовой линии {data.get('format')!r}")
+    return {name: Result(**r) for name, r in data["results"].items()}
+
+
+def compare(results: Dict[str, Result], base: Dict[str, Result],
+            threshold: float) -> Tuple[List[str], List[str]]:
+    """Имена замеров (регрессии, ускорения) по медиане."""
+    slower: List[str] = []
+    faster: List[str] = []
+    for name, r in results.items():
+        b = base.get(name)
+        if b is None or b.p50_us <= 0:
+            continue
+        ratio = r.p50_us / b.p50_us
+        if ratio > 1 + threshold:
+            slower.append(name)
+        elif ratio < 1 / (1 + threshold):
+            faster.append(name)
+    return slower, faster
+
+
+# ---- вывод ----
+
+def _fmt_us(us: float) -> str:
+    return f"{us / 1000:.2f}ms" if us >= 1000 else f"{us:.1f}us"
+
+
+def print_gen_stats(cases: List[Case]) -> None:
+    """Среднее на вызов generate_level: попытки и время, рядом прежняя выборка."""
+    tallied = [c for c in cases if c.tally is not None and c.tally.runs]
+    if not tallied:
+        return
+    width = max(len(c.name) for c in tallied) + 2
+    print()
+    print(f"{'генерация':<{width}}{'карта':>9}{'стены':>7}{'вызовов':>9}"
+          f"{'попыток':>9}{'время':>10}")
+    for c in tallied:
+        t = c.tally
+        print(f"{c.name:<{width}}{f'{t.cfg.w}x{t.cfg.h}':>9}{t.cfg.wall_prob:>7.2f}"
+              f"{t.runs:>9}{t.attempts / t.runs:>9.2f}{_fmt_us(t.seconds / t.runs * 1e6):>10}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-k", dest="filters", action="append", default=[],
+                    help="только замеры, в имени которых есть подстрока (можно несколько)")
+    ap.add_argument("--budget", type=float, default=0.3, help="секунд на замер")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--save", metavar="JSON", help="сохранить результаты как базовую линию")
+    ap.add_argument("--compare", metavar="JSON", help="сравнить с базовой линией")
+    ap.add_argument("--threshold", type=float, default=0.15,
+                    help="допустимый рост медианы при сравнении (0.15 = 15%%)")
+    args = ap.parse_args(argv)
+
+    base = load_baseline(args.compare) if args.compare else {}
+
+    cases = build_cases(args.seed)
+    if args.filters:
+        cases = [c for c in cases if any(f in c.name for f in args.filters)]
+
+    width = max((len(c.name) for c in cases), default=10) + 2
+    head = f"{'замер':<{width}}{'оп/с':>11}{'p50':>10}{'p90':>10}{'p99':>10}"
+    print(head + ("   к базе" if base else ""))
+
+    results: Dict[str, Result] = {}
+    for case in cases:
+        r = results[case.name] = measure(case.fn, args.budget)
+        line = (f"{case.name:<{width}}{r.ops:>11.1f}{_fmt_us(r.p50_us):>10}"
+                f"{_fmt_us(r.p90_us):>10}{_fmt_us(r.p99_us):>10}")
+        b = base.get(case.name)
+        if b is not None and b.p50_us > 0:
+            ratio = r.p50_us / b.p50_us
+            mark = " !" if ratio > 1 + args.threshold else ""
+            line += f"{ratio:>8.2f}x{mark}"
+        print(line, flush=True)
+    print_gen_stats(cases)
+
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"базовая линия сохранена: {args.save}")
+
+    if base:
+        slower, faster = compare(results, base, args.threshold)
+        missing = sorted(set(results) - set(base))
+        print(f"быстрее: {len(faster)}, медленнее: {len(slower)}, нет в базе: {len(missing)}")
+        for name in slower:
+            print(f"  регрессия: {name} ({_fmt_us(base[name].p50_us)} -> {_fmt_us(results[name].p50_us)})")
+        if slower:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())